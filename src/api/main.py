@@ -106,8 +106,8 @@ async def predict(request: PredictionRequest):
     
     log_entry = logger.log_prediction(
         ip=request.source_ip,
-        prediction=result['final_prediction'][0],
-        score=result['final_score'][0],
+        prediction=int(result['final_prediction'][0]),
+        score=float(result['final_score'][0]),
         latency=latency
     )
     
@@ -115,11 +115,11 @@ async def predict(request: PredictionRequest):
         prediction=log_entry["prediction"],
         threat_score=log_entry["threat_score"],
         severity=log_entry["severity"],
-        confidence=result['confidence'][0],
+        confidence=float(result['confidence'][0]),
         contributions={
-            "rf": result['rf_contribution'][0],
-            "pattern": result['cnn_contribution'][0],
-            "anomaly": result['ae_contribution'][0]
+            "rf": float(result['rf_contribution'][0]),
+            "pattern": float(result['cnn_contribution'][0]),
+            "anomaly": float(result['ae_contribution'][0])
         },
         latency_ms=log_entry["response_time_ms"]
     )
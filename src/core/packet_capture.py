@@ -7,6 +7,9 @@ import threading
 from collections import deque
 from datetime import datetime
 
+# Import ML Engine
+from src.core.ml_engine import ml_engine
+
 # Scapy requires root/admin network access and is unavailable in cloud containers.
 # We gracefully disable it if it fails to import.
 SCAPY_AVAILABLE = False
@@ -102,9 +105,6 @@ class PacketCapture:
             logger.error(f"Capture loop crashed: {e}")
             self.is_running = False
 
-# Import ML Engine
-from src.core.ml_engine import ml_engine
-
     def _process_packet(self, packet) -> Optional[Dict[str, Any]]:
         """Process a single packet and extract features."""
         try:
@@ -14,6 +14,9 @@ import os
 import time
 from pathlib import Path
 
+# Import the singleton scanner instance
+from src.core.packet_capture import scanner_instance
+
 # Set page config
 st.set_page_config(
     page_title="SmartGuard AI",
@@ -32,6 +35,18 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def get_detector(filepath: str):
+    """
+    Load a trained AnomalyDetector once per worker process (Cached).
+    
+    Dashboard code should call this instead of AnomalyDetector.load_model so
+    the model is not re-read on every rerun; it is reloaded only when the
+    path changes.
+    """
+    from src.detection.anomaly_detector import AnomalyDetector
+    return AnomalyDetector.load_model(filepath)
+
 class SmartGuardDashboard:
     def __init__(self):
         self.data_dir = Path(os.path.expanduser("~")).joinpath("SmartGuardAI", "data")
@@ -46,7 +61,7 @@ class SmartGuardDashboard:
     def get_latest_capture_file(self):
         """Get the most recent capture file."""
         try:
-            capture_files = list(self.raw_data_dir.glob("capture_*.csv"))
+            capture_files = list(self.raw_data_dir.glob("capture_*.parquet")) + list(self.raw_data_dir.glob("capture_*.csv"))
             if not capture_files:
                 return None
             return max(capture_files, key=os.path.getmtime)
@@ -58,7 +73,7 @@ class SmartGuardDashboard:
     def load_data(_self, file_path):
         """Load and preprocess data from a capture file (Cached)."""
         try:
-            df = pd.read_csv(file_path)
+            df = pd.read_parquet(file_path) if str(file_path).endswith('.parquet') else pd.read_csv(file_path)
             if 'timestamp' in df.columns:
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
                 df = df.sort_values('timestamp')
@@ -185,9 +200,6 @@ class SmartGuardDashboard:
         st.title("🛡️ SmartGuard AI - Network Threat Detection")
         st.markdown("---")
         
-# Import the singleton scanner instance
-from src.core.packet_capture import scanner_instance
-
         # Sidebar for controls
         st.sidebar.header("Dashboard Controls")
         
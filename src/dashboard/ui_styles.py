@@ -2,15 +2,21 @@
 import streamlit as st
 import functools
 
+# Fonts are pulled with <link> tags rather than a CSS @import so the font
+# stylesheet downloads in parallel with the main style block
+PREMIUM_FONT_LINKS = """
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700;800&family=JetBrains+Mono:wght@400;700&display=swap">
+"""
+
 # Global Premium Typography and Styling
 @st.cache_data
 def get_premium_css():
     """Returns the CSS for the premium 'Ancrid-style' design system."""
     return """
     <style>
-        /* Global Reset & Premium Typography */
-        @import url('https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700;800&family=JetBrains+Mono:wght@400;700&display=swap');
-
+        /* Global Reset & Premium Typography (fonts linked in inject_premium_styles) */
         html, body, [class*="css"] {
             font-family: 'Outfit', sans-serif;
             color: #F8FAFC;
@@ -28,10 +34,8 @@ def get_premium_css():
         }
 
         /* Hide Streamlit Native UI for 'Pure Website' feel */
-        [data-testid="stSidebar"] { display: none !important; }
-        [data-testid="stHeader"] { display: none !important; }
-        footer { visibility: hidden !important; }
-        #MainMenu { visibility: hidden !important; }
+        [data-testid="stSidebar"], [data-testid="stHeader"] { display: none !important; }
+        footer, #MainMenu { visibility: hidden !important; }
         
         /* Premium Floating Navbar (ancrid-inspired) */
         .navbar {
@@ -121,15 +125,15 @@ def get_premium_css():
             margin-bottom: 2rem;
         }
 
-        .hero-title {
-            font-size: 4rem !important;
-            font-weight: 800 !important;
-            line-height: 1.1 !important;
-            letter-spacing: -0.04em !important;
+        .stApp .hero-title {
+            font-size: 4rem;
+            font-weight: 800;
+            line-height: 1.1;
+            letter-spacing: -0.04em;
             background: linear-gradient(180deg, #FFFFFF 0%, #94A3B8 100%);
             -webkit-background-clip: text;
             -webkit-text-fill-color: transparent;
-            margin-bottom: 1.5rem !important;
+            margin-bottom: 1.5rem;
         }
 
         .hero-subtitle {
@@ -145,20 +149,21 @@ def get_premium_css():
             padding-bottom: 5rem;
         }
 
-        /* Buttons Fix */
-        .stButton button {
-            background: #14B8A6 !important;
-            color: #030712 !important;
-            border-radius: 999px !important;
-            font-weight: 700 !important;
-            padding: 0.5rem 2rem !important;
-            border: none !important;
+        /* Buttons Fix (scoped under .stApp to outrank Streamlit's single-class rules) */
+        .stApp .stButton button {
+            background: #14B8A6;
+            color: #030712;
+            border-radius: 999px;
+            font-weight: 700;
+            padding: 0.5rem 2rem;
+            border: none;
         }
     </style>
     """
 
 def inject_premium_styles():
     """Injects global 'Modern Enterprise' design system."""
+    st.markdown(PREMIUM_FONT_LINKS, unsafe_allow_html=True)
     st.markdown(get_premium_css(), unsafe_allow_html=True)
 
 def floating_navbar(active_page="Home"):
@@ -195,12 +200,17 @@ def render_hero(title, subtitle):
     </div>
     """, unsafe_allow_html=True)
 
-def glass_card(title, value, subtitle=None):
-    """Render a premium glassmorphic metric card with modern typography."""
-    st.markdown(f"""
+@functools.lru_cache(maxsize=128)
+def _glass_card_html(title, value, subtitle=None):
+    """Build the glass card markup; a pure function of its inputs, so it is memoized."""
+    return f"""
     <div class="glass-card" style="background: rgba(30, 41, 59, 0.4); border: 1px solid rgba(255, 255, 255, 0.05); border-radius: 8px; padding: 24px; margin-bottom: 16px; backdrop-filter: blur(8px);">
         <div style="font-size: 0.75rem; font-weight: 600; color: #94A3B8; text-transform: uppercase;">{title}</div>
         <div style="font-size: 2.25rem; font-weight: 700; color: #F8FAFC;">{value}</div>
         {f'<div style="font-size: 0.875rem; color: #64748B;">{subtitle}</div>' if subtitle else ''}
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+def glass_card(title, value, subtitle=None):
+    """Render a premium glassmorphic metric card with modern typography."""
+    st.markdown(_glass_card_html(title, value, subtitle), unsafe_allow_html=True)
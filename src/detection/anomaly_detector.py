@@ -1,29 +1,112 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
 from typing import Dict, Any, Optional, Tuple
-import joblib
 import os
 import logging
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import lz4  # noqa: F401  (enables joblib's lz4 compressor)
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Expected path length of an unsuccessful BST search over n samples."""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    path_length = np.zeros_like(n_samples)
+    path_length[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    n = n_samples[mask]
+    path_length[mask] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return path_length
+
+
+def _precision_recall_sweep(y: np.ndarray, y_score: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Precision/recall at every distinct score, via one sort and a cumulative sum.
+    
+    Returns arrays laid out exactly like sklearn's precision_recall_curve
+    (increasing thresholds, with the final precision=1/recall=0 point).
+    
+    Args:
+        y: True labels (1 for positive)
+        y_score: Scores where higher values indicate the positive class
+        
+    Returns:
+        Tuple of (precision, recall, thresholds)
+    """
+    order = np.argsort(y_score, kind='mergesort')[::-1]
+    y_score = y_score[order]
+    y_sorted = (np.asarray(y)[order] == 1).astype(np.float64)
+    
+    # Last index of each run of equal scores
+    threshold_idxs = np.r_[np.flatnonzero(np.diff(y_score)), y_sorted.size - 1]
+    tps = np.cumsum(y_sorted)[threshold_idxs]
+    fps = 1 + threshold_idxs - tps
+    
+    precision = np.divide(tps, tps + fps, out=np.zeros_like(tps), where=(tps + fps) != 0)
+    recall = tps / tps[-1]
+    return (
+        np.r_[precision[::-1], 1.0],
+        np.r_[recall[::-1], 0.0],
+        y_score[threshold_idxs][::-1],
+    )
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _forest_depth_kernel(X, features, thresholds, left, right, leaf_depth):
+        """Sum the isolation depth of every sample over all flattened trees."""
+        n_samples = X.shape[0]
+        n_trees = features.shape[0]
+        depths = np.zeros(n_samples)
+        for i in prange(n_samples):
+            total = 0.0
+            for t in range(n_trees):
+                node = 0
+                while left[t, node] != -1:
+                    if X[i, features[t, node]] <= thresholds[t, node]:
+                        node = left[t, node]
+                    else:
+                        node = right[t, node]
+                total += leaf_depth[t, node]
+            depths[i] = total
+        return depths
+
 class AnomalyDetector:
     """
     A class for detecting anomalies in network traffic using Isolation Forest.
     """
     
-    def __init__(self, model_params: Dict[str, Any] = None):
+    def __init__(self, model_params: Dict[str, Any] = None, fast: bool = True):
         """
         Initialize the AnomalyDetector.
         
         Args:
             model_params: Dictionary of parameters for the Isolation Forest model
+            fast: Sub-sample every tree to at most 256 rows (the size from the
+                original Isolation Forest paper, beyond which detection quality
+                plateaus), fixed to min(256, n_samples) at fit time. Raise
+                n_estimators rather than max_samples for more accuracy. When
+                False, max_samples stays at sklearn's 'auto'. An explicit
+                max_samples in model_params always wins.
         """
+        # Imported here to keep sklearn off the module import path (dashboard cold start)
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.pipeline import Pipeline
+        
         # Default parameters
         default_params = {
             'n_estimators': 100,
@@ -46,31 +129,124 @@ class AnomalyDetector:
             ('isolation_forest', IsolationForest(**default_params))
         ])
         
+        # Resolve max_samples against the training set size in train()
+        self._cap_samples = fast and 'max_samples' not in (model_params or {})
+        
         # Store training metrics
         self.training_metrics = {}
         
-    def preprocess_data(self, X: pd.DataFrame) -> pd.DataFrame:
+        # Flattened tree arrays for the JIT scoring kernel, built lazily
+        self._forest_arrays: Optional[Tuple[np.ndarray, ...]] = None
+        
+        # Fitted scaler statistics (mean, 1 / scale) as float32, built lazily
+        # (kept as one attribute so concurrent scorers never see half of it)
+        self._scaler_stats: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        
+    def preprocess_data(self, X: pd.DataFrame, inplace: bool = False) -> np.ndarray:
         """
         Preprocess the input data for the model.
         
         Args:
             X: Input features DataFrame
+            inplace: Allow NaNs to be filled in a buffer shared with X
+                (only when the caller owns the DataFrame)
             
         Returns:
-            Preprocessed DataFrame
+            Preprocessed float32 feature matrix
         """
-        # Make a copy to avoid modifying the original
-        X_processed = X.copy()
+        # A single typed conversion casts bool columns (True -> 1.0) and all
+        # numeric columns at once, without materialising a DataFrame copy.
+        # StandardScaler keeps float32 and IsolationForest splits on float32
+        # internally, so downcasting here halves memory traffic end to end
+        X_processed = np.ascontiguousarray(X.to_numpy(dtype=np.float32, na_value=np.nan))
         
-        # Convert boolean columns to int
-        for col in X_processed.select_dtypes(include=['bool']).columns:
-            X_processed[col] = X_processed[col].astype(int)
-        
-        # Fill any remaining NaNs with 0
-        X_processed = X_processed.fillna(0)
+        # Fill any remaining NaNs with 0, copying only when there are any
+        nan_mask = np.isnan(X_processed)
+        if nan_mask.any():
+            if inplace:
+                X_processed[nan_mask] = 0
+            else:
+                X_processed = np.where(nan_mask, np.float32(0), X_processed)
         
         return X_processed
     
+    def _flatten_forest(self) -> Tuple[np.ndarray, ...]:
+        """
+        Stack the fitted trees into padded (n_trees, max_nodes) arrays.
+        
+        Returns:
+            Tuple of (features, thresholds, left, right, leaf_depth) arrays
+        """
+        forest = self.model['isolation_forest']
+        trees = [est.tree_ for est in forest.estimators_]
+        n_trees = len(trees)
+        max_nodes = max(tree.node_count for tree in trees)
+        subsample_features = forest._max_features != forest.n_features_in_
+        
+        features = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        thresholds = np.zeros((n_trees, max_nodes), dtype=np.float64)
+        left = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        right = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        leaf_depth = np.zeros((n_trees, max_nodes), dtype=np.float64)
+        
+        for t, (tree, tree_features) in enumerate(zip(trees, forest.estimators_features_)):
+            n = tree.node_count
+            feature = np.maximum(tree.feature, 0)
+            features[t, :n] = tree_features[feature] if subsample_features else feature
+            thresholds[t, :n] = tree.threshold
+            left[t, :n] = tree.children_left
+            right[t, :n] = tree.children_right
+            
+            # Depth of each node, walking parents before children
+            node_depth = np.zeros(n, dtype=np.float64)
+            for node in range(n):
+                if tree.children_left[node] != -1:
+                    node_depth[tree.children_left[node]] = node_depth[node] + 1.0
+                    node_depth[tree.children_right[node]] = node_depth[node] + 1.0
+            leaf_depth[t, :n] = node_depth + _average_path_length(tree.n_node_samples)
+        
+        return features, thresholds, left, right, leaf_depth
+    
+    def _scale(self, X_processed: np.ndarray) -> np.ndarray:
+        """
+        Standardize features with the fitted scaler statistics in one fused expression.
+        
+        Args:
+            X_processed: Preprocessed float32 feature matrix
+            
+        Returns:
+            Scaled float32 feature matrix
+        """
+        stats = self._scaler_stats
+        if stats is None:
+            scaler = self.model['scaler']
+            stats = self._scaler_stats = (np.asarray(scaler.mean_, dtype=np.float32),
+                                          (1.0 / scaler.scale_).astype(np.float32))
+        mean, inv_scale = stats
+        return (X_processed - mean) * inv_scale
+    
+    def _decision_function(self, X_processed: np.ndarray) -> np.ndarray:
+        """
+        Score preprocessed features, using the JIT kernel when numba is available.
+        
+        Args:
+            X_processed: Preprocessed float32 feature matrix
+            
+        Returns:
+            Array of anomaly scores matching IsolationForest.decision_function
+        """
+        forest = self.model['isolation_forest']
+        X_scaled = self._scale(X_processed)
+        if not HAS_NUMBA:
+            return forest.decision_function(X_scaled)
+        
+        if self._forest_arrays is None:
+            self._forest_arrays = self._flatten_forest()
+        
+        depths = _forest_depth_kernel(X_scaled, *self._forest_arrays)
+        denominator = len(forest.estimators_) * _average_path_length([forest.max_samples_])[0]
+        return -np.power(2.0, -depths / denominator) - forest.offset_
+    
     def train(self, X: pd.DataFrame) -> Dict[str, Any]:
         """
         Train the anomaly detection model.
@@ -85,17 +261,25 @@ class AnomalyDetector:
             # Preprocess the data
             X_processed = self.preprocess_data(X)
             
+            # Sized to the data so small training sets do not trigger sklearn's
+            # "max_samples > n_samples" warning
+            if self._cap_samples:
+                self.model.set_params(isolation_forest__max_samples=min(256, len(X_processed)))
+            
             # Train the model
             self.model.fit(X_processed)
+            self._forest_arrays = None
+            self._scaler_stats = None
             
             # Calculate training metrics
-            train_scores = self.model.decision_function(X_processed)
+            train_scores = self._decision_function(X_processed)
             
             # Store metrics
             self.training_metrics = {
                 'n_samples': len(X_processed),
                 'n_features': X_processed.shape[1],
-                'anomaly_ratio': np.mean(self.model.predict(X_processed) == -1),
+                # predict() flags exactly the samples with a negative decision score
+                'anomaly_ratio': float(np.mean(train_scores < 0)),
                 'avg_anomaly_score': np.mean(train_scores),
                 'min_anomaly_score': np.min(train_scores),
                 'max_anomaly_score': np.max(train_scores)
@@ -122,7 +306,7 @@ class AnomalyDetector:
         """
         try:
             X_processed = self.preprocess_data(X)
-            return self.model.predict(X_processed)
+            return np.where(self._decision_function(X_processed) < 0, -1, 1)
         except Exception as e:
             logger.error(f"Error during prediction: {str(e)}")
             raise
@@ -139,11 +323,48 @@ class AnomalyDetector:
         """
         try:
             X_processed = self.preprocess_data(X)
-            return self.model.decision_function(X_processed)
+            return self._decision_function(X_processed)
         except Exception as e:
             logger.error(f"Error during probability prediction: {str(e)}")
             raise
     
+    def predict_batched(self, X: pd.DataFrame, chunk: int = 65536) -> np.ndarray:
+        """
+        Predict anomaly scores for large inputs in row chunks.
+        
+        Without numba, chunks are scored concurrently on a thread pool (sklearn's
+        tree walk releases the GIL) with OpenMP capped at one thread per call to
+        avoid oversubscribing cores. The numba kernel already spreads rows over
+        all cores, so with numba the chunks are scored one after another.
+        
+        Args:
+            X: Input features DataFrame
+            chunk: Number of rows scored per call
+            
+        Returns:
+            Array of anomaly scores (lower values indicate higher anomaly likelihood)
+        """
+        try:
+            X_processed = self.preprocess_data(X)
+            starts = range(0, X_processed.shape[0], chunk)
+            
+            if HAS_NUMBA or len(starts) <= 1:
+                parts = [self._decision_function(X_processed[i:i + chunk]) for i in starts]
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+                from threadpoolctl import threadpool_limits
+                
+                with threadpool_limits(limits=1, user_api='openmp'):
+                    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                        parts = list(pool.map(
+                            lambda i: self._decision_function(X_processed[i:i + chunk]), starts
+                        ))
+            
+            return np.concatenate(parts) if parts else np.empty(0)
+        except Exception as e:
+            logger.error(f"Error during batched prediction: {str(e)}")
+            raise
+    
     def evaluate(self, X: pd.DataFrame, y: np.ndarray = None, threshold: float = None) -> Dict[str, Any]:
         """
         Evaluate the model on test data.
@@ -158,16 +379,22 @@ class AnomalyDetector:
         """
         try:
             # Get anomaly scores
-            scores = self.predict_proba(X)
+            X_processed = self.preprocess_data(X)
+            scores = self._decision_function(X_processed)
             
             # If threshold is not provided, use the one that maximizes F1 score
             if y is not None and threshold is None:
-                from sklearn.metrics import precision_recall_curve, f1_score
+                from sklearn.metrics import f1_score
                 
                 # Invert scores since we want lower scores to indicate anomalies
-                precision, recall, thresholds = precision_recall_curve(
-                    y, -scores, pos_label=1
-                )
+                if np.any(np.asarray(y) == 1):
+                    precision, recall, thresholds = _precision_recall_sweep(y, -scores)
+                else:
+                    # No positives: let sklearn handle the degenerate curve
+                    from sklearn.metrics import precision_recall_curve
+                    precision, recall, thresholds = precision_recall_curve(
+                        y, -scores, pos_label=1
+                    )
                 
                 # Calculate F1 score for each threshold
                 f1_scores = 2 * (precision * recall) / (precision + recall + 1e-10)
@@ -198,19 +425,26 @@ class AnomalyDetector:
             logger.error(f"Error during evaluation: {str(e)}")
             raise
     
-    def save_model(self, filepath: str):
+    def save_model(self, filepath: str, compress: bool = True):
         """
         Save the trained model to disk.
         
         Args:
             filepath: Path to save the model
+            compress: Compress the pickle (lz4 when installed, zlib otherwise).
+                Pass False to keep the file memory-mappable by load_model.
         """
+        import joblib
+        
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
             
             # Save the model
-            joblib.dump(self.model, filepath)
+            if compress:
+                joblib.dump(self.model, filepath, compress=('lz4', 3) if HAS_LZ4 else 3)
+            else:
+                joblib.dump(self.model, filepath)
             logger.info(f"Model saved to {filepath}")
             
         except Exception as e:
@@ -218,22 +452,26 @@ class AnomalyDetector:
             raise
     
     @classmethod
-    def load_model(cls, filepath: str) -> 'AnomalyDetector':
+    def load_model(cls, filepath: str, mmap_mode: Optional[str] = None) -> 'AnomalyDetector':
         """
         Load a trained model from disk.
         
         Args:
             filepath: Path to the saved model
+            mmap_mode: Memory-map the tree arrays instead of reading them into
+                RAM (e.g. 'r'); only effective for uncompressed models
             
         Returns:
             Loaded AnomalyDetector instance
         """
+        import joblib
+        
         try:
             # Create a new instance
             detector = cls()
             
             # Load the model
-            detector.model = joblib.load(filepath)
+            detector.model = joblib.load(filepath, mmap_mode=mmap_mode)
             logger.info(f"Model loaded from {filepath}")
             
             return detector
@@ -6,6 +6,7 @@ from typing import Any, Deque, Dict, Iterable, List, Mapping, Optional, Sequence
 
 import numpy as np
 import pandas as pd
+from scipy.special import expit
 
 
 @dataclass(frozen=True)
@@ -38,6 +39,7 @@ class Predictor:
         self.model = model
         self.confidence_threshold = float(confidence_threshold)
         self.normal_class_names = tuple(str(x).lower() for x in normal_class_names)
+        self._normal_set = frozenset(self.normal_class_names)
         self.per_class_thresholds: Dict[Union[int, str], float] = dict(per_class_thresholds or {})
 
         self.smoothing_window = int(smoothing_window)
@@ -70,10 +72,10 @@ class Predictor:
 
     def _fallback_confidence(self, scores_1d: np.ndarray) -> np.ndarray:
         # Map arbitrary scores to (0, 1) with a logistic transform.
-        return 1.0 / (1.0 + np.exp(-scores_1d))
+        return expit(scores_1d)
 
     def _is_normal_label(self, label: Union[int, str]) -> bool:
-        return str(label).lower() in self.normal_class_names
+        return str(label).lower() in self._normal_set
 
     def _apply_per_class_thresholding(
         self,
@@ -102,22 +104,26 @@ class Predictor:
         y_adj = y_pred.copy()
         conf_adj = conf.copy()
 
-        for i in range(len(y_adj)):
-            pred_label = y_adj[i]
-            try:
-                pred_idx = classes_list.index(pred_label)
-            except ValueError:
-                continue
-
-            threshold = self.per_class_thresholds.get(pred_label)
-            if threshold is None:
-                continue
-
-            pred_prob = float(proba[i, pred_idx])
-            if pred_prob < float(threshold):
-                # Downgrade to normal class to reduce false positives.
-                y_adj[i] = classes_list[normal_idx]
-                conf_adj[i] = float(proba[i, normal_idx])
+        # Resolve class index and threshold once per distinct label (trailing
+        # entry is the "no match" sentinel used for missing labels, code -1).
+        class_to_idx = {c: i for i, c in reversed(list(enumerate(classes_list)))}
+        codes, uniques = pd.factorize(y_adj)
+        label_idx = np.full(len(uniques) + 1, -1, dtype=np.intp)
+        label_threshold = np.full(len(uniques) + 1, np.nan)
+        for j, label in enumerate(uniques):
+            threshold = self.per_class_thresholds.get(label)
+            if label in class_to_idx and threshold is not None:
+                label_idx[j] = class_to_idx[label]
+                label_threshold[j] = float(threshold)
+
+        pred_idx = label_idx[codes]
+        eligible = pred_idx >= 0
+        pred_prob = proba[np.arange(len(y_adj)), np.where(eligible, pred_idx, 0)]
+        # Downgrade to normal class to reduce false positives.
+        downgrade = eligible & (pred_prob < label_threshold[codes])
+
+        y_adj[downgrade] = classes_list[normal_idx]
+        conf_adj[downgrade] = proba[downgrade, normal_idx]
 
         return y_adj, conf_adj
 
@@ -125,26 +131,35 @@ class Predictor:
         if self.smoothing_window <= 1:
             return conf
 
-        smoothed = np.empty_like(conf, dtype=float)
-        for i, val in enumerate(conf):
-            self._score_history.append(float(val))
-            smoothed[i] = float(np.mean(self._score_history))
+        # Rolling mean over (history + new scores): each output averages the last
+        # `smoothing_window` scores seen so far, across calls. Every window is
+        # averaged directly, as np.mean over the history would, so scores sitting
+        # exactly on the confidence threshold stay there (a running-sum difference
+        # would drift by a few ulps).
+        w = self.smoothing_window
+        history = np.fromiter(self._score_history, dtype=float, count=len(self._score_history))
+        full = np.concatenate([history, np.asarray(conf, dtype=float)])
+
+        # Outputs whose window is not full yet (at most w - 1 of them, at start-up)
+        first_full = max(w, len(history) + 1)
+        partial = [full[:end].mean() for end in range(len(history) + 1, min(first_full, len(full) + 1))]
+        smoothed = np.array(partial, dtype=float)
+        if len(full) >= first_full:
+            # The copy makes each window a contiguous row, reduced like a 1-d array
+            windows = np.lib.stride_tricks.sliding_window_view(full, w)[first_full - w:].copy()
+            smoothed = np.concatenate([smoothed, windows.mean(axis=1)])
+
+        self._score_history.extend(full[len(history):].tolist())
         return smoothed
 
     def _severity(self, y_pred: np.ndarray, confidence: np.ndarray) -> np.ndarray:
-        sev = np.empty(len(y_pred), dtype=object)
-        for i, (lbl, c) in enumerate(zip(y_pred, confidence)):
-            if self._is_normal_label(lbl):
-                sev[i] = "Low"
-                continue
-
-            if c >= 0.9:
-                sev[i] = "High"
-            elif c >= 0.7:
-                sev[i] = "Medium"
-            else:
-                sev[i] = "Low"
-        return sev
+        confidence = np.asarray(confidence, dtype=float)
+        labels = np.char.lower(np.asarray(y_pred).astype(str))
+        normal_mask = np.isin(labels, self.normal_class_names)
+
+        sev = np.select([confidence >= 0.9, confidence >= 0.7], ["High", "Medium"], default="Low")
+        sev[normal_mask] = "Low"
+        return sev.astype(object)
 
     def predict(self, X: pd.DataFrame) -> PredictionResult:
         """Predict labels with confidence + severity.
@@ -1,15 +1,38 @@
-import logging
+import atexit
 import json
-import time
+import threading
+import weakref
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 from datetime import datetime
 from collections import deque
 from pathlib import Path
 from typing import Dict, Any
 
+# Loggers still open at interpreter exit get their buffered lines flushed; the set
+# holds them weakly so registering does not keep discarded loggers alive
+_OPEN_LOGGERS: "weakref.WeakSet[StructuredLogger]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_loggers():
+    for logger in list(_OPEN_LOGGERS):
+        logger.close()
+
+
 class StructuredLogger:
     """
     JSON structured logger for production monitoring and threat tracking.
     """
+    # Write batching: flush once this many bytes are pending, and at most this many
+    # seconds after the first pending line (a timer covers otherwise idle loggers)
+    FLUSH_BYTES = 64 * 1024
+    FLUSH_INTERVAL = 1.0
+
     def __init__(self, log_dir: str = "logs", buffer_size: int = 50):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -18,13 +41,12 @@ class StructuredLogger:
         # In-memory buffer for last 50 alerts
         self.alert_buffer = deque(maxlen=buffer_size)
         
-        # Configure standard logging to use JSON
-        self.logger = logging.getLogger("SmartGuard_Structured")
-        self.logger.setLevel(logging.INFO)
-        
-        if not self.logger.handlers:
-            handler = logging.FileHandler(self.log_file)
-            self.logger.addHandler(handler)
+        # JSON lines are batched in memory and appended with one write per flush
+        self._fh = open(self.log_file, "ab", buffering=1 << 16)
+        self._byte_buf = bytearray()
+        self._flush_timer = None
+        self._lock = threading.Lock()
+        _OPEN_LOGGERS.add(self)
 
     def log_prediction(self, ip: str, prediction: int, score: float, latency: float):
         """
@@ -42,13 +64,57 @@ class StructuredLogger:
         }
         
         # Save to JSON log file
-        self.logger.info(json.dumps(log_entry))
+        line = self._dumps(log_entry) + b"\n"
+        with self._lock:
+            # Lines buffered after close() could never be written
+            if self._fh.closed:
+                raise ValueError("log_prediction() on a closed StructuredLogger")
+            self._byte_buf += line
+            if len(self._byte_buf) >= self.FLUSH_BYTES:
+                self._flush_locked()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_INTERVAL, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
         
         # Add to in-memory buffer if it's a threat or for dashboard visibility
         self.alert_buffer.append(log_entry)
         
         return log_entry
 
+    @staticmethod
+    def _dumps(entry: Dict[str, Any]) -> bytes:
+        """Serialize a log entry; orjson handles numpy scalars natively."""
+        if HAS_ORJSON:
+            return orjson.dumps(entry, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(entry, default=float).encode()
+
+    def _flush_locked(self):
+        if self._byte_buf and not self._fh.closed:
+            self._fh.write(self._byte_buf)
+            self._fh.flush()
+            self._byte_buf.clear()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._flush_timer = None
+            self._flush_locked()
+
+    def flush(self):
+        """Write any buffered log lines to disk."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush buffered log lines and close the log file."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._flush_locked()
+            self._fh.close()
+        _OPEN_LOGGERS.discard(self)
+
     def _calculate_severity(self, score: float) -> str:
         if score < 0.5:
             return "Low"
@@ -1,6 +1,7 @@
 import os
 import sys
 import argparse
+import functools
 import logging
 import pandas as pd
 from datetime import datetime
@@ -10,7 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import local modules
 from core.packet_capture import PacketCapture, capture_live_traffic
-from features.feature_engineering import extract_features, FeatureEngineer
+from features.feature_engineering import extract_features, extract_features_from_processed, FeatureEngineer
 from detection.anomaly_detector import AnomalyDetector
 from config.config import DATA_PATHS, MODEL_CONFIG, FEATURE_CONFIG, NETWORK_CONFIG
 
@@ -25,6 +26,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Packet columns consumed by feature extraction; everything else is skipped on load
+CAPTURE_COLUMNS = ['timestamp', 'length', 'protocol', 'src_ip', 'dst_ip', 'sport', 'dport']
+
+def load_capture(path):
+    """
+    Load a packet capture, reading only the columns feature extraction needs.
+    
+    Args:
+        path: Path to a .parquet capture (or a legacy .csv capture)
+        
+    Returns:
+        DataFrame containing the captured packets
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        available = set(pq.read_schema(path).names)
+        return pd.read_parquet(path, columns=[c for c in CAPTURE_COLUMNS if c in available])
+    return pd.read_csv(path, usecols=lambda c: c in CAPTURE_COLUMNS)
+
+@functools.lru_cache(maxsize=4)
+def _load_and_preprocess_cached(path, mtime):
+    df = load_capture(path)
+    return FeatureEngineer().preprocess_data(df, copy=False)
+
+def load_and_preprocess(path):
+    """
+    Load and preprocess a capture file, memoized on (path, mtime) so reruns
+    over an unchanged capture skip the read and preprocessing entirely.
+    
+    The returned DataFrame is shared between callers and must not be modified.
+    
+    Args:
+        path: Path to a .parquet or .csv capture
+        
+    Returns:
+        Preprocessed packet DataFrame
+    """
+    path = os.path.abspath(path)
+    return _load_and_preprocess_cached(path, os.path.getmtime(path))
+
 class SmartGuardAI:
     """
     Main class for the SmartGuard AI Network Threat Detector.
@@ -100,9 +141,10 @@ class SmartGuardAI:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 output_file = os.path.join(
                     self.config['data_paths']['raw_data'],
-                    f'capture_{timestamp}.csv'
+                    f'capture_{timestamp}.parquet'
                 )
-                packets_df.to_csv(output_file, index=False)
+                # Columnar + typed: no string re-parsing of IPs/protocols on reload
+                packets_df.to_parquet(output_file, index=False, compression='zstd')
                 logger.info(f"Saved captured packets to {output_file}")
             
             return packets_df
@@ -117,26 +159,37 @@ class SmartGuardAI:
         
         Args:
             packets_df: DataFrame containing packets (optional)
-            input_file: Path to CSV file containing packets (optional)
+            input_file: Path to Parquet (or CSV) file containing packets (optional)
             
         Returns:
             Tuple of (basic_features, time_series_features, flow_features)
         """
         try:
-            # Load data if not provided
+            window_size = self.config['feature_config'].get('window_size', 10)
+            
+            # Load data if not provided (cached per capture file and mtime)
             if packets_df is None and input_file:
                 logger.info(f"Loading packets from {input_file}")
-                packets_df = pd.read_csv(input_file)
-            
-            if packets_df is None or packets_df.empty:
-                raise ValueError("No packet data provided or data is empty")
-            
-            # Extract features
-            logger.info("Extracting features from packets...")
-            basic_features, time_series_features, flow_features = extract_features(
-                packets_df,
-                window_size=self.config['feature_config'].get('window_size', 10)
-            )
+                df_processed = load_and_preprocess(input_file)
+                
+                if df_processed.empty:
+                    raise ValueError("No packet data provided or data is empty")
+                
+                logger.info("Extracting features from packets...")
+                basic_features, time_series_features, flow_features = extract_features_from_processed(
+                    df_processed,
+                    window_size=window_size
+                )
+            else:
+                if packets_df is None or packets_df.empty:
+                    raise ValueError("No packet data provided or data is empty")
+                
+                # Extract features
+                logger.info("Extracting features from packets...")
+                basic_features, time_series_features, flow_features = extract_features(
+                    packets_df,
+                    window_size=window_size
+                )
             
             # Save extracted features
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -244,7 +297,7 @@ def parse_arguments():
     
     # Process command
     process_parser = subparsers.add_parser('process', help='Process captured packets')
-    process_parser.add_argument('-i', '--input', required=True, help='Input CSV file containing packets')
+    process_parser.add_argument('-i', '--input', required=True, help='Input Parquet or CSV file containing packets')
     
     # Train command
     train_parser = subparsers.add_parser('train', help='Train the anomaly detection model')
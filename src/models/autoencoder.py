@@ -9,25 +9,48 @@ class AnomalyDetectorSklearn:
     def __init__(self, contamination: float = 0.1):
         self.model = IsolationForest(contamination=contamination, random_state=42)
         self.threshold = 0.5 # Dummy to keep interface consistent
+        # Decision-function range seen on the training data, used to normalize scores
+        self._score_min = None
+        self._score_max = None
 
     def fit(self, X):
         self.model.fit(X)
+        train_scores = self.model.decision_function(X)
+        self._score_min = float(train_scores.min())
+        self._score_max = float(train_scores.max())
 
     def is_anomaly(self, X):
         """Returns binary labels (1 for anomaly, 0 for normal)."""
-        preds = self.model.predict(X)
-        return (preds == -1).astype(int)
+        labels, _ = self._both(X)
+        return labels
 
     def get_reconstruction_error(self, X):
         """Returns the anomaly score (lower is more abnormal). 
         We invert it so higher is more abnormal for the ensemble logic."""
         scores = self.model.decision_function(X) # Higher = more normal
-        # Normalize to 0-1 where 1 is more abnormal
-        min_score = np.min(scores) if len(scores) > 0 else 0
-        max_score = np.max(scores) if len(scores) > 0 else 1
+        return self._normalize(scores)
+
+    def _both(self, X):
+        """Anomaly labels and normalized anomaly scores from a single forest pass."""
+        # decision_function = score_samples - offset_, and predict flags decision_function < 0
+        scores = self.model.score_samples(X)
+        scores -= self.model.offset_
+        labels = (scores < 0).astype(np.int8)
+        return labels, self._normalize(scores)
+
+    def _normalize(self, scores):
+        # Normalize to 0-1 where 1 is more abnormal, using the range calibrated at fit time
+        min_score = getattr(self, '_score_min', None)
+        max_score = getattr(self, '_score_max', None)
+        if min_score is None or max_score is None:
+            # Not fitted through fit() (e.g. an older pickle): fall back to the batch range
+            min_score = np.min(scores) if len(scores) > 0 else 0
+            max_score = np.max(scores) if len(scores) > 0 else 1
         if max_score == min_score:
             return np.zeros_like(scores)
-        return (max_score - scores) / (max_score - min_score)
+        out = np.subtract(max_score, scores, out=scores)
+        out /= (max_score - min_score)
+        return np.clip(out, 0, 1, out=out)
 
     def save(self, path):
         import joblib
@@ -1,5 +1,6 @@
+import warnings
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import joblib
 
 class HybridThreatDetector:
@@ -18,37 +19,69 @@ class HybridThreatDetector:
             'pattern': 0.4,
             'anomaly': 0.2
         }
+        self._refresh_weight_vector()
         
-    def predict(self, X: np.ndarray) -> Dict[str, Any]:
+    def _refresh_weight_vector(self):
+        # Weights in the row order of the stacked score matrix used by predict
+        self._weight_vector = np.array([
+            self.weights['rf'],
+            self.weights['pattern'],
+            self.weights['anomaly']
+        ])
+        
+    def predict(self, X: np.ndarray, return_lists: bool = False) -> Dict[str, Any]:
         """
         Produce individual and ensemble predictions.
-        """
-        # 1. Random Forest prediction
-        rf_proba = self.rf_model.predict_proba(X)[:, 1]
         
-        # 2. Pattern (MLP) prediction
-        pattern_proba = self.pattern_model.predict(X).flatten()
-        
-        # 3. Anomaly scores
-        ae_scores = self.anomaly_model.get_reconstruction_error(X)
+        Every value in the returned dict is an ndarray with one entry per row
+        of X; pass return_lists=True (or convert with .tolist() / float() at the
+        serialization boundary) when plain Python values are needed.
+        """
+        result = self.predict_batched(X)
+        if return_lists:
+            return {key: value.tolist() for key, value in result.items()}
+        return result
+
+    def predict_batched(self, X: np.ndarray, chunk: int = 16384) -> Dict[str, np.ndarray]:
+        """
+        Score X in row chunks, writing into preallocated float32 output arrays
+        so the per-chunk working set stays small on very large batches.
+        """
+        n = len(X)
+        contributions = np.empty((3, n), dtype=np.float32)
+        final_scores = np.empty(n, dtype=np.float32)
+        scores = np.empty((3, min(chunk, n)), dtype=np.float32)
         
-        # Weighted Ensemble Voting
-        final_scores = (
-            self.weights['rf'] * rf_proba +
-            self.weights['pattern'] * pattern_proba +
-            self.weights['anomaly'] * ae_scores
-        )
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            X_chunk = X[start:stop]
+            chunk_scores = scores[:, :stop - start]
+            
+            # 1. Random Forest prediction
+            chunk_scores[0] = self.rf_model.predict_proba(X_chunk)[:, 1]
+            # 2. Pattern (MLP) prediction
+            chunk_scores[1] = self.pattern_model.predict(X_chunk).ravel()
+            # 3. Anomaly scores
+            chunk_scores[2] = self.anomaly_model.get_reconstruction_error(X_chunk)
+            
+            # Weighted Ensemble Voting over the (3, chunk) score matrix
+            np.multiply(chunk_scores, self._weight_vector[:, None], out=contributions[:, start:stop])
+            contributions[:, start:stop].sum(axis=0, out=final_scores[start:stop])
         
         # Final prediction label
         final_labels = (final_scores > 0.5).astype(int)
         
+        confidence = np.abs(final_scores - 0.5)
+        confidence *= 2
+        np.clip(confidence, 0, 1, out=confidence)
+        
         return {
-            'final_prediction': final_labels.tolist(),
-            'final_score': final_scores.tolist(),
-            'rf_contribution': (self.weights['rf'] * rf_proba).tolist(),
-            'cnn_contribution': (self.weights['pattern'] * pattern_proba).tolist(),
-            'ae_contribution': (self.weights['anomaly'] * ae_scores).tolist(),
-            'confidence': np.clip(np.abs(final_scores - 0.5) * 2, 0, 1).tolist()
+            'final_prediction': final_labels,
+            'final_score': final_scores,
+            'rf_contribution': contributions[0],
+            'cnn_contribution': contributions[1],
+            'ae_contribution': contributions[2],
+            'confidence': confidence
         }
 
     def tune_weights(self, metrics: Dict[str, float]):
@@ -58,11 +91,36 @@ class HybridThreatDetector:
                 metric_key = f"{key}_f1"
                 if metric_key in metrics:
                     self.weights[key] = metrics[metric_key] / total_score
+        self._refresh_weight_vector()
+        
+    def save(self, path: str, compress: bool = False):
+        """
+        Persist the ensemble to f"{path}_hybrid_ensemble.joblib".
         
-    def save(self, path: str):
+        Left uncompressed by default so load() can memory-map the plain numpy
+        arrays (MLP weights and biases). Tree node arrays are always copied into
+        sklearn's own buffers on load, whatever the format.
+        """
         joblib.dump({
             'weights': self.weights,
             'rf_model': self.rf_model,
             'pattern_model': self.pattern_model,
             'anomaly_model': self.anomaly_model
-        }, f"{path}_hybrid_ensemble.joblib")
+        }, f"{path}_hybrid_ensemble.joblib", compress=3 if compress else 0, protocol=5)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'HybridThreatDetector':
+        """
+        Load an ensemble written by save(). For uncompressed files the MLP
+        weights stay memory-mapped read-only, so worker processes share those
+        pages; the forests' tree node arrays are copied by Tree.__setstate__
+        and remain private to each process.
+        """
+        with warnings.catch_warnings():
+            # joblib ignores mmap_mode for compressed files and warns about it
+            warnings.filterwarnings("ignore", message=".*mmap_mode.*compressed.*")
+            state = joblib.load(f"{path}_hybrid_ensemble.joblib", mmap_mode=mmap_mode)
+        detector = cls(state['rf_model'], state['pattern_model'], state['anomaly_model'])
+        detector.weights = state['weights']
+        detector._refresh_weight_vector()
+        return detector
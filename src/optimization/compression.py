@@ -26,12 +26,30 @@ def prune_cnn(model, X_train, y_train):
     
     return tfmot.sparsity.keras.strip_pruning(pruned_model)
 
-def quantize_and_save_tflite(keras_model, output_path):
+def quantize_and_save_tflite(keras_model, output_path, rep_data=None):
     """
     Applies post-training quantization and saves as TFLite.
+    
+    With rep_data (a sample of training inputs) the model is fully integer
+    quantized, including activations and the input/output tensors, which
+    calibrates on up to 500 samples. Without it, dynamic-range quantization
+    is used.
     """
     converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
     converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    
+    if rep_data is not None:
+        sample_shape = tuple(keras_model.input_shape[1:])
+        
+        def representative_dataset():
+            for x in rep_data[:500]:
+                yield [np.asarray(x, dtype=np.float32).reshape((1,) + sample_shape)]
+        
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    
     tflite_model = converter.convert()
     
     with open(output_path, 'wb') as f:
@@ -39,28 +57,104 @@ def quantize_and_save_tflite(keras_model, output_path):
     
     return os.path.getsize(output_path)
 
-def benchmark_tflite(tflite_path, X_test):
+def benchmark_tflite(tflite_path, X_test, batch_size=100, repeats=10):
     """
     Benchmarks inference latency for TFLite model.
+    
+    Samples are fed as one batch per invoke so the measurement reflects kernel
+    time rather than per-call interpreter dispatch. Returns the mean and std of
+    the per-sample latency (seconds) over the timed repeats.
     """
     import time
     
-    interpreter = tf.lite.Interpreter(model_path=tflite_path)
+    interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=os.cpu_count())
+    input_details = interpreter.get_input_details()
+    
+    input_data = np.asarray(X_test[:min(batch_size, len(X_test))], dtype=np.float32)
+    if len(input_data.shape) == 2:
+        input_data = np.expand_dims(input_data, axis=-1)
+    batch = input_data.shape[0]
+    
+    # Full-integer models take quantized int8 input
+    if input_details[0]['dtype'] == np.int8:
+        scale, zero_point = input_details[0]['quantization']
+        input_data = np.clip(np.round(input_data / scale + zero_point), -128, 127).astype(np.int8)
+    
+    interpreter.resize_tensor_input(input_details[0]['index'], list(input_data.shape))
     interpreter.allocate_tensors()
+    interpreter.set_tensor(input_details[0]['index'], input_data)
     
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
+    # Warm-up run so lazy allocation is not timed
+    interpreter.invoke()
     
     latencies = []
-    for i in range(min(100, len(X_test))):
-        input_data = np.expand_dims(X_test[i], axis=0).astype(np.float32)
-        if len(input_data.shape) == 2:
-            input_data = np.expand_dims(input_data, axis=-1)
-            
-        interpreter.set_tensor(input_details[0]['index'], input_data)
-        
-        start_time = time.time()
+    for _ in range(repeats):
+        start_time = time.perf_counter_ns()
         interpreter.invoke()
-        latencies.append(time.time() - start_time)
+        latencies.append((time.perf_counter_ns() - start_time) / 1e9 / batch)
         
     return np.mean(latencies), np.std(latencies)
+
+def _round_down_to_float32(values):
+    """
+    Round float64 values to the largest float32 not above them, so that for any
+    float32 input x, `x <= t` and `x <= rounded(t)` agree (trees compare float32 X).
+    """
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded.astype(np.float64)
+
+def _quantize_trees(estimators, backups):
+    for est in estimators:
+        tree = est.tree_
+        backups.append((tree.threshold, tree.threshold.copy()))
+        backups.append((tree.value, tree.value.copy()))
+        # Both properties are views onto the tree's node storage, so write in place
+        tree.threshold[:] = _round_down_to_float32(tree.threshold)
+        tree.value[:] = tree.value.astype(np.float32)
+
+def compress_hybrid(detector, X_val=None, y_val=None, max_accuracy_drop=0.01):
+    """
+    Reduces the precision of a HybridThreatDetector's weights for edge deployment.
+    
+    sklearn trees store their nodes in fixed float64 records, so RF and
+    IsolationForest thresholds are snapped down onto the float32 grid (split
+    decisions on float32 inputs are unchanged) and leaf values are rounded to
+    float32; the zeroed low mantissa bits make compressed bundles smaller. MLP
+    weights are cast to float32, which halves their size and keeps BLAS matmuls
+    on the fast single-precision path.
+    
+    If X_val/y_val are given and accuracy drops by more than max_accuracy_drop,
+    all changes are reverted.
+    
+    Returns:
+        True if the compressed weights were kept, False if they were reverted
+    """
+    baseline = None
+    if X_val is not None and y_val is not None:
+        baseline = np.mean(detector.predict(X_val)['final_prediction'] == y_val)
+    
+    backups = []
+    _quantize_trees(detector.rf_model.estimators_, backups)
+    anomaly_forest = getattr(detector.anomaly_model, 'model', None)
+    if hasattr(anomaly_forest, 'estimators_'):
+        _quantize_trees(anomaly_forest.estimators_, backups)
+    
+    mlp = getattr(detector.pattern_model, 'model', None)
+    mlp_weights = None
+    if hasattr(mlp, 'coefs_'):
+        mlp_weights = (mlp.coefs_, mlp.intercepts_)
+        mlp.coefs_ = [c.astype(np.float32) for c in mlp.coefs_]
+        mlp.intercepts_ = [b.astype(np.float32) for b in mlp.intercepts_]
+    
+    if baseline is not None:
+        accuracy = np.mean(detector.predict(X_val)['final_prediction'] == y_val)
+        if baseline - accuracy > max_accuracy_drop:
+            for target, original in backups:
+                target[:] = original
+            if mlp_weights is not None:
+                mlp.coefs_, mlp.intercepts_ = mlp_weights
+            return False
+    
+    return True
@@ -4,11 +4,25 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import f1_score, precision_score, recall_score
 from sklearn.model_selection import train_test_split
-import tensorflow as tf
-from ..models.cnn_model import CNNClassifier
-from ..models.autoencoder import AutoencoderAnomalyDetector
+from ..models.cnn_model import NeuralClassifierSklearn
+from ..models.autoencoder import AnomalyDetectorSklearn
+
+
+def _report(trial, value, step):
+    """Report an intermediate validation metric to Optuna and stop unpromising trials."""
+    trial.report(value, step)
+    if trial.should_prune():
+        raise optuna.TrialPruned()
+
+
+def _make_pruner():
+    # ASHA-style successive halving: only the top 1/3 of trials at each rung keep training
+    return optuna.pruners.SuccessiveHalvingPruner(min_resource=1, reduction_factor=3)
+
 
 def optimize_rf(X, y):
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
     def objective(trial):
         n_estimators = trial.suggest_int('n_estimators', 50, 300)
         max_depth = trial.suggest_int('max_depth', 5, 30)
@@ -20,50 +34,66 @@ def optimize_rf(X, y):
             class_weight='balanced'
         )
         
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         clf.fit(X_train, y_train)
         preds = clf.predict(X_test)
         return f1_score(y_test, preds)
 
     study = optuna.create_study(direction='maximize')
-    study.optimize(objective, n_trials=20)
+    # Trials are independent, so run them concurrently
+    study.optimize(objective, n_trials=20, n_jobs=-1)
     return study.best_params
 
 def optimize_cnn(X, y):
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Convert once so every trial reuses the same arrays instead of re-copying them
+    X_train, X_test = np.asarray(X_train), np.asarray(X_test)
+    y_train = np.asarray(y_train)
+    classes = np.unique(y_train)
+
+    def val_f1(clf):
+        preds = (clf.predict(X_test) > 0.5).astype(int).flatten()
+        return f1_score(y_test, preds)
+
     def objective(trial):
         lr = trial.suggest_float('lr', 1e-4, 1e-2, log=True)
-        filters = trial.suggest_categorical('filters', [16, 32, 64])
+        hidden_units = trial.suggest_categorical('hidden_units', [16, 32, 64])
         
-        model = CNNClassifier(input_shape=(X.shape[1], 1))
-        optimizer = tf.keras.optimizers.Adam(learning_rate=lr)
-        model.compile(optimizer=optimizer, loss='binary_crossentropy', metrics=['accuracy'])
+        # The MLP's fixed random_state gives every trial with the same width the same initial weights
+        clf = NeuralClassifierSklearn(hidden_layer_sizes=(hidden_units, 32))
+        clf.model.set_params(learning_rate_init=lr, batch_size=32)
         
-        # Simple training loop for tuning
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        model.fit(X_train, y_train, epochs=5, batch_size=32, verbose=0)
+        # Simple training loop for tuning: one partial_fit per epoch, with F1
+        # reported each epoch so weak trials stop early
+        for epoch in range(5):
+            clf.model.partial_fit(X_train, y_train, classes=classes)
+            score = val_f1(clf)
+            _report(trial, score, epoch)
         
-        preds = (model.predict(X_test) > 0.5).astype(int).flatten()
-        return f1_score(y_test, preds)
+        return score
 
-    study = optuna.create_study(direction='maximize')
+    study = optuna.create_study(direction='maximize', pruner=_make_pruner())
     study.optimize(objective, n_trials=10)
     return study.best_params
 
 def optimize_autoencoder(X):
+    X_train, X_test = train_test_split(X, test_size=0.2, random_state=42)
+    # Convert once so every trial reuses the same arrays instead of re-copying them
+    X_train, X_test = np.asarray(X_train), np.asarray(X_test)
+
     def objective(trial):
-        bottleneck = trial.suggest_int('bottleneck', 4, 16)
-        
-        model = AutoencoderAnomalyDetector(input_dim=X.shape[1], bottleneck_dim=bottleneck)
-        model.compile(optimizer='adam', loss='mae')
+        n_estimators = trial.suggest_int('n_estimators', 50, 300)
+        max_features = trial.suggest_float('max_features', 0.5, 1.0)
         
-        X_train, X_test = train_test_split(X, test_size=0.2, random_state=42)
-        model.fit(X_train, X_train, epochs=10, batch_size=32, verbose=0)
+        detector = AnomalyDetectorSklearn()
+        detector.model.set_params(n_estimators=n_estimators, max_features=max_features)
+        detector.fit(X_train)
         
-        reconstructions = model.predict(X_test)
-        loss = tf.keras.losses.mae(reconstructions, X_test)
-        # We want to minimize reconstruction error on normal data
-        return np.mean(loss)
+        # Raw score_samples share one scale across trials (unlike the min/max-normalized
+        # get_reconstruction_error); negated so higher = more abnormal.
+        # We want to minimize it on held-out normal data
+        return float(np.mean(-detector.model.score_samples(X_test)))
 
     study = optuna.create_study(direction='minimize')
-    study.optimize(objective, n_trials=10)
+    # Trials are independent, so run them concurrently
+    study.optimize(objective, n_trials=10, n_jobs=-1)
     return study.best_params
@@ -1,22 +1,48 @@
 from __future__ import annotations
 
+import warnings
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 import joblib
 
+try:
+    import lz4  # noqa: F401  (enables joblib's lz4 compressor)
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
 from .training import TrainedBundle
 
 
-def save_bundle(bundle: TrainedBundle, path: str | Path) -> None:
+def save_bundle(bundle: TrainedBundle, path: str | Path, compress: bool = True) -> None:
+    """Persist a bundle with pickle protocol 5.
+
+    Compressed bundles (lz4 when installed, zlib otherwise) are several times
+    smaller; pass compress=False to keep the file memory-mappable by load_bundle.
+    """
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(bundle, p)
+    if compress:
+        joblib.dump(bundle, p, compress=("lz4", 3) if HAS_LZ4 else 3, protocol=5)
+    else:
+        joblib.dump(bundle, p, protocol=5)
+
 
+def load_bundle(path: str | Path, mmap_mode: Optional[str] = "r") -> TrainedBundle:
+    """Load a bundle saved by save_bundle.
 
-def load_bundle(path: str | Path) -> TrainedBundle:
+    For uncompressed bundles plain numpy arrays (e.g. MLP weights) are
+    memory-mapped, so worker processes share the same read-only pages instead
+    of each holding a private copy. Tree-based models copy their node arrays
+    into sklearn's own buffers on load either way. Compressed bundles are read
+    into memory.
+    """
     p = Path(path)
-    obj: Any = joblib.load(p)
+    with warnings.catch_warnings():
+        # joblib ignores mmap_mode for compressed files and warns about it
+        warnings.filterwarnings("ignore", message=".*mmap_mode.*compressed.*")
+        obj: Any = joblib.load(p, mmap_mode=mmap_mode)
     if not isinstance(obj, TrainedBundle):
         raise TypeError(f"Expected TrainedBundle in artifact file, got: {type(obj)}")
     return obj
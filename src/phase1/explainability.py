@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
@@ -18,37 +19,73 @@ class ModelExplainer:
         self.X_train = X_train
         self.explainer = None
         self.shap_values = None
+        # Recent local explanations, keyed by instance contents
+        self._local_cache: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
         
         # Initialize explainer
         # Note: robust checking for model type could be added here
         try:
-            self.explainer = shap.TreeExplainer(self.model)
+            # Path-dependent mode walks the trees' own cover statistics, so no background set is needed
+            self.explainer = shap.TreeExplainer(self.model, feature_perturbation="tree_path_dependent")
+            self._is_tree = True
         except Exception as e:
             # Fallback for non-tree models (e.g. SVM), though slower
-            # Using X_train summary to speed up KernelExplainer
-            background = shap.sample(self.X_train, 50)
+            # Using a fixed X_train summary to speed up KernelExplainer
+            background = shap.sample(self.X_train, 50, random_state=42)
             self.explainer = shap.KernelExplainer(self.model.predict_proba, background)
+            self._is_tree = False
+        
+        self.expected_value = self.explainer.expected_value
+
+    _LOCAL_CACHE_SIZE = 32
+
+    def _local_shap_values(self, X_instance: pd.DataFrame) -> Any:
+        """SHAP values for X_instance, reused when the same instance is explained again."""
+        values = np.ascontiguousarray(X_instance.to_numpy())
+        key = (tuple(X_instance.columns), values.shape, values.dtype.str, values.tobytes())
+        
+        cached = self._local_cache.get(key)
+        if cached is not None:
+            self._local_cache.move_to_end(key)
+            return cached
+        
+        if self._is_tree:
+            # Trees evaluate float32 inputs; skip the additivity re-check on every call
+            shap_values = self.explainer.shap_values(
+                X_instance.to_numpy(dtype=np.float32), check_additivity=False
+            )
+        else:
+            shap_values = self.explainer.shap_values(X_instance)
+        self._local_cache[key] = shap_values
+        if len(self._local_cache) > self._LOCAL_CACHE_SIZE:
+            self._local_cache.popitem(last=False)
+        return shap_values
 
     def explain_global(self, X_sample: pd.DataFrame) -> Any:
         """
         Calculate SHAP values for a sample of data (global view).
         """
         # SHAP for trees usually returns list [values_class0, values_class1] for binary
-        shap_values = self.explainer.shap_values(X_sample)
+        if self._is_tree:
+            # Global summaries aggregate over many rows, so the fast Saabas
+            # approximation is used instead of exact path enumeration
+            shap_values = self.explainer.shap_values(X_sample, approximate=True, check_additivity=False)
+        else:
+            shap_values = self.explainer.shap_values(X_sample)
         return shap_values
 
     def explain_local(self, X_instance: pd.DataFrame) -> Any:
         """
         Calculate SHAP values for a single instance.
         """
-        shap_values = self.explainer.shap_values(X_instance)
+        shap_values = self._local_shap_values(X_instance)
         return shap_values
 
     def get_text_explanation(self, X_instance: pd.DataFrame, class_idx: int = 1) -> List[str]:
         """
         Generate human-readable explanation for a specific prediction.
         """
-        shap_values = self.explainer.shap_values(X_instance)
+        shap_values = self._local_shap_values(X_instance)
         
         # Handle different return shapes from shap
         if isinstance(shap_values, list):
@@ -74,20 +111,19 @@ class ModelExplainer:
             
         feature_names = X_instance.columns
         
-        # Create (feature, contribution) pairs
-        contributions = []
-        for name, val in zip(feature_names, vals):
-            contributions.append((name, val))
-            
-        # Sort by absolute magnitude
-        contributions.sort(key=lambda x: abs(x[1]), reverse=True)
+        vals = vals[:len(feature_names)]
         
-        top_n = contributions[:3]
-        explanations = []
+        # Top 3 features by absolute contribution, without sorting every feature
+        magnitude = np.abs(vals)
+        n_top = min(3, len(vals))
+        top_idx = np.argpartition(-magnitude, n_top - 1)[:n_top] if n_top < len(vals) else np.arange(len(vals))
+        top_idx = top_idx[np.argsort(-magnitude[top_idx], kind="stable")]
         
-        for name, val in top_n:
-            impact = "increased" if val > 0 else "decreased"
-            strength = "significantly" if abs(val) > 0.1 else "slightly"
-            explanations.append(f"The feature **{name}** {impact} the threat score {strength}.")
-            
-        return explanations
+        top_vals = vals[top_idx]
+        impacts = np.where(top_vals > 0, "increased", "decreased")
+        strengths = np.where(magnitude[top_idx] > 0.1, "significantly", "slightly")
+        
+        return [
+            f"The feature **{feature_names[i]}** {impact} the threat score {strength}."
+            for i, impact, strength in zip(top_idx, impacts, strengths)
+        ]
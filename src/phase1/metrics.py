@@ -13,6 +13,18 @@ from sklearn.metrics import (
 )
 
 
+def _binary_counts(y_true: np.ndarray, y_pred: np.ndarray) -> Optional[np.ndarray]:
+    """Return (tn, fp, fn, tp) for 0/1 integer labels in one pass, or None if not applicable."""
+    if y_true.dtype.kind not in "biu" or y_pred.dtype.kind not in "biu":
+        return None
+    if y_true.ndim != 1 or y_true.shape != y_pred.shape or len(y_true) == 0:
+        return None
+    # Anything outside {0, 1} is left to sklearn, which rejects it as multiclass
+    if y_true.min() < 0 or y_true.max() > 1 or y_pred.min() < 0 or y_pred.max() > 1:
+        return None
+    return np.bincount(2 * y_true.astype(np.intp) + y_pred.astype(np.intp), minlength=4)
+
+
 def classification_metrics(
     y_true: np.ndarray,
     y_pred: np.ndarray,
@@ -20,13 +32,28 @@ def classification_metrics(
     y_score: Optional[np.ndarray] = None,
     average: str = "binary",
 ) -> Dict[str, Any]:
-    metrics: Dict[str, Any] = {
-        "accuracy": float(accuracy_score(y_true, y_pred)),
-        "precision": float(precision_score(y_true, y_pred, average=average, zero_division=0)),
-        "recall": float(recall_score(y_true, y_pred, average=average, zero_division=0)),
-        "f1": float(f1_score(y_true, y_pred, average=average, zero_division=0)),
-        "roc_auc": None,
-    }
+    counts = None
+    if average == "binary":
+        counts = _binary_counts(np.asarray(y_true), np.asarray(y_pred))
+
+    if counts is not None:
+        # Derive every metric from the single confusion-matrix pass
+        tn, fp, fn, tp = (int(c) for c in counts)
+        metrics: Dict[str, Any] = {
+            "accuracy": (tp + tn) / (tn + fp + fn + tp),
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+            "f1": 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0,
+            "roc_auc": None,
+        }
+    else:
+        metrics = {
+            "accuracy": float(accuracy_score(y_true, y_pred)),
+            "precision": float(precision_score(y_true, y_pred, average=average, zero_division=0)),
+            "recall": float(recall_score(y_true, y_pred, average=average, zero_division=0)),
+            "f1": float(f1_score(y_true, y_pred, average=average, zero_division=0)),
+            "roc_auc": None,
+        }
 
     if y_score is not None:
         try:
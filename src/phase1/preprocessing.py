@@ -98,7 +98,11 @@ class CleanInfValues(BaseEstimator, TransformerMixin):
 
 
 def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
-    """Create a preprocessing transformer: clean -> impute -> one-hot encode -> scale."""
+    """Create a preprocessing transformer: clean -> impute -> one-hot encode -> scale.
+
+    The output is a scipy CSR matrix when the one-hot columns make it mostly
+    zeros, and a dense array otherwise.
+    """
     cat_cols = X.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
     num_cols = [c for c in X.columns if c not in cat_cols]
 
@@ -113,7 +117,7 @@ def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
     categorical_pipe = Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="most_frequent")),
-            ("onehot", OneHotEncoder(handle_unknown="ignore", sparse_output=False)),
+            ("onehot", OneHotEncoder(handle_unknown="ignore", sparse_output=True)),
         ]
     )
 
@@ -123,6 +127,8 @@ def build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
             ("cat", categorical_pipe, cat_cols),
         ],
         remainder="drop",
+        # One-hot-heavy outputs (overall density < 30%) stay CSR instead of being densified
+        sparse_threshold=0.3,
         verbose_feature_names_out=False,
     )
 
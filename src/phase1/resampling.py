@@ -3,9 +3,29 @@ from __future__ import annotations
 from typing import Tuple
 
 import numpy as np
+import scipy.sparse as sp
 
 from sklearn.neighbors import NearestNeighbors
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _fill_synthetic(X_min, idx, neigh_idx, alpha, out):
+        """Write x_i + alpha * (x_n - x_i) for every synthetic row straight into out."""
+        n, d = out.shape
+        for i in prange(n):
+            a = alpha[i]
+            ii = idx[i]
+            ni = neigh_idx[i]
+            for j in range(d):
+                out[i, j] = X_min[ii, j] + a * (X_min[ni, j] - X_min[ii, j])
+
 
 def smote_resample(
     X: np.ndarray,
@@ -20,7 +40,7 @@ def smote_resample(
     where `imbalanced-learn` is unavailable or version-incompatible.
 
     Args:
-        X: Feature matrix of shape (n_samples, n_features)
+        X: Feature matrix of shape (n_samples, n_features), dense or scipy sparse
         y: Binary label array of shape (n_samples,) with values {0,1}
         k_neighbors: Number of nearest neighbors to use for interpolation
         random_state: RNG seed
@@ -29,14 +49,15 @@ def smote_resample(
         (X_resampled, y_resampled)
     """
 
-    X = np.asarray(X)
+    is_sparse = sp.issparse(X)
+    X = sp.csr_matrix(X) if is_sparse else np.asarray(X)
     y = np.asarray(y)
 
     if X.ndim != 2:
         raise ValueError("X must be 2D")
     if y.ndim != 1:
         raise ValueError("y must be 1D")
-    if len(X) != len(y):
+    if X.shape[0] != len(y):
         raise ValueError("X and y must have the same length")
 
     classes, counts = np.unique(y, return_counts=True)
@@ -54,13 +75,18 @@ def smote_resample(
 
     X_min = X[y == min_class]
 
-    if len(X_min) < 2:
+    if X_min.shape[0] < 2:
         return X, y
 
     rng = np.random.default_rng(int(random_state))
 
-    k = int(max(1, min(k_neighbors, len(X_min) - 1)))
-    nn = NearestNeighbors(n_neighbors=k + 1)
+    k = int(max(1, min(k_neighbors, X_min.shape[0] - 1)))
+    # Tree index for low-dimensional data (kd-tree degrades towards brute force past ~30 dims)
+    nn = NearestNeighbors(
+        n_neighbors=k + 1,
+        algorithm="kd_tree" if X_min.shape[1] <= 30 and not is_sparse else "auto",
+        n_jobs=-1,
+    )
     nn.fit(X_min)
 
     # Cap synthetic generation to avoid excessive slowdowns on large, highly-imbalanced datasets.
@@ -74,16 +100,28 @@ def smote_resample(
     # Precompute neighbors once for all minority samples (exclude self at index 0).
     neigh = nn.kneighbors(X_min, return_distance=False)[:, 1:]
 
-    idx = rng.integers(0, len(X_min), size=n_to_generate)
+    idx = rng.integers(0, X_min.shape[0], size=n_to_generate)
     neigh_pos = rng.integers(0, neigh.shape[1], size=n_to_generate)
     neigh_idx = neigh[idx, neigh_pos]
 
-    x_i = X_min[idx]
-    x_n = X_min[neigh_idx]
-    alpha = rng.random(size=n_to_generate).reshape(-1, 1)
-    synth = x_i + alpha * (x_n - x_i)
-
-    X_res = np.vstack([X, synth])
+    # synth = x_i + alpha * (x_n - x_i), in the input's float precision
+    dtype = X.dtype if X.dtype in (np.float32, np.float64) else np.float64
+    alpha = rng.random(size=(n_to_generate, 1), dtype=dtype)
+    if is_sparse:
+        # Stay sparse: one-hot blocks interpolate between 0/1 entries without densifying
+        x_i = X_min[idx]
+        synth = x_i + (X_min[neigh_idx] - x_i).multiply(alpha).tocsr()
+    elif HAS_NUMBA:
+        synth = np.empty((n_to_generate, X_min.shape[1]), dtype=dtype)
+        _fill_synthetic(np.ascontiguousarray(X_min), idx, neigh_idx, alpha[:, 0], synth)
+    else:
+        x_i = X_min[idx].astype(dtype, copy=False)
+        synth = X_min[neigh_idx].astype(dtype, copy=False)
+        synth -= x_i
+        synth *= alpha
+        synth += x_i
+
+    X_res = sp.vstack([X, synth], format="csr") if is_sparse else np.vstack([X, synth])
     y_res = np.concatenate([y, np.full(n_to_generate, min_class, dtype=y.dtype)])
 
     return X_res, y_res
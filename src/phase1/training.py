@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
 
 from sklearn.model_selection import train_test_split
 
@@ -93,10 +103,16 @@ def train_binary_classifier(
     )
 
     # Save a sample of training data for SHAP background
-    # X_train_t is numpy, convert to DF with names for better usability
+    # X_train_t may be sparse; only the sampled rows are densified into a DF with names
     feature_names = get_feature_names(preprocessor)
-    X_train_sample_df = pd.DataFrame(X_train_t, columns=feature_names).sample(
-        n=min(100, len(X_train_t)), random_state=42
+    n_train = X_train_t.shape[0]
+    # Same rows DataFrame.sample(random_state=42) picked, without building a frame to sample from
+    sample_rows = np.random.RandomState(42).choice(n_train, size=min(100, n_train), replace=False)
+    X_sample = X_train_t[sample_rows]
+    X_train_sample_df = pd.DataFrame(
+        X_sample.toarray() if sp.issparse(X_sample) else X_sample,
+        columns=feature_names,
+        index=sample_rows,
     )
 
     bundle = TrainedBundle(
@@ -111,6 +127,48 @@ def train_binary_classifier(
     return bundle, metrics, pred_df
 
 
+_TRANSFORM_CACHE_SIZE = 32
+# Keyed by id(bundle) without holding the bundle: a finalizer purges a bundle's
+# entries when it is collected, before its id can be reused
+_transform_cache: "OrderedDict[Tuple[int, Any], np.ndarray]" = OrderedDict()
+_tracked_bundles: set = set()
+
+
+def _forget_bundle(bundle_id: int) -> None:
+    _tracked_bundles.discard(bundle_id)
+    for key in [key for key in _transform_cache if key[0] == bundle_id]:
+        del _transform_cache[key]
+
+
+def _frame_digest(X: pd.DataFrame) -> Tuple[Any, ...]:
+    """Content key for a dataframe: column layout plus a hash of the per-row hashes."""
+    row_hashes = np.ascontiguousarray(pd.util.hash_pandas_object(X, index=False).to_numpy())
+    if HAS_XXHASH:
+        digest = xxhash.xxh3_64(row_hashes).intdigest()
+    else:
+        digest = hashlib.blake2b(row_hashes, digest_size=8).digest()
+    return tuple(X.columns), tuple(map(str, X.dtypes)), len(X), digest
+
+
 def transform_features(bundle: TrainedBundle, X: pd.DataFrame) -> np.ndarray:
-    """Transform raw feature dataframe into model-ready numpy array."""
-    return bundle.preprocessor.transform(X)
+    """Transform raw feature dataframe into model-ready numpy array.
+
+    Results are cached per (bundle, frame content) so Streamlit reruns on the same
+    upload skip preprocessing. The returned array is read-only.
+    """
+    key = (id(bundle), _frame_digest(X))
+    hit = _transform_cache.get(key)
+    if hit is not None:
+        _transform_cache.move_to_end(key)
+        return hit
+
+    X_t = bundle.preprocessor.transform(X)
+    X_t = X_t.toarray() if sp.issparse(X_t) else np.asarray(X_t)
+    X_t.flags.writeable = False
+    if key[0] not in _tracked_bundles:
+        _tracked_bundles.add(key[0])
+        weakref.finalize(bundle, _forget_bundle, key[0])
+    _transform_cache[key] = X_t
+    if len(_transform_cache) > _TRANSFORM_CACHE_SIZE:
+        _transform_cache.popitem(last=False)
+    return X_t
@@ -1,7 +1,8 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from .signature_scanner import SignatureScanner
 from .ml_scanner import MLScanner
 from .heuristic_scanner import HeuristicScanner
+from concurrent.futures import ThreadPoolExecutor
 import time
 import numpy as np
 
@@ -10,23 +11,35 @@ class MalwareEngine:
     The main orchestrator for Phase V Extended Malware Analysis.
     Combines 3 layers of security checks into a final risk assessment.
     """
+    # Smaller files scan faster sequentially than the thread hand-off costs
+    PARALLEL_MIN_BYTES = 1 << 18
+
     def __init__(self, ensemble=None):
         self.signature_layer = SignatureScanner()
         self.ml_layer = MLScanner(ensemble=ensemble)
         self.heuristic_layer = HeuristicScanner()
+        # The layers only read the (immutable) file bytes and spend their time in
+        # GIL-releasing code (hashlib, numpy, regex engines), so they can overlap
+        self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="malware-scan")
 
     def calculate_entropy_fragmentation(self, data: bytes) -> Dict[str, any]:
         """Checks for variations in entropy across file chunks to detect hidden payloads."""
         if len(data) < 1024: return {"score": 0, "signals": []}
         
         chunk_size = len(data) // 10
-        entropies = []
-        for i in range(10):
-            chunk = data[i*chunk_size:(i+1)*chunk_size]
-            entropies.append(self.ml_layer.calculate_entropy(chunk))
+        # All 10 chunk histograms from one bincount: offset each row's byte values by 256 * row
+        chunks = np.frombuffer(data, dtype=np.uint8, count=chunk_size * 10).reshape(10, chunk_size)
+        offsets = (np.arange(10, dtype=np.intp) * 256)[:, None]
+        hists = np.bincount((chunks + offsets).ravel(), minlength=10 * 256).reshape(10, 256)
+        
+        p = hists / chunk_size
+        log_p = np.log2(p, out=np.zeros_like(p), where=p > 0)
+        entropies = (0.0 - (p * log_p).sum(axis=1)).tolist()
         
-        variance = np.var(entropies)
-        max_diff = np.max(entropies) - np.min(entropies)
+        # Ten values: plain float math is cheaper than three NumPy reductions
+        mean = sum(entropies) / 10
+        variance = sum((e - mean) ** 2 for e in entropies) / 10
+        max_diff = max(entropies) - min(entropies)
         
         signals = []
         frag_score = 0
@@ -39,41 +52,146 @@ class MalwareEngine:
             
         return {"score": frag_score, "signals": signals}
 
-    def scan_file(self, file_data: bytes, filename: str) -> Dict[str, Any]:
+    def _skipped_layers(self, file_data: bytes, filename: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Placeholder ML, heuristic and fragmentation results for a file whose signature already
+        proves it malicious. Only the cheap fields the report and correlation rely on are filled in:
+        the entropy and the filename intent bonus.
+        """
+        ml_result = {
+            "entropy": round(self.ml_layer.calculate_entropy(file_data), 4),
+            "ml_risk_score": 0,
+            "confidence": 0.5,
+            "layer": "Machine Learning (Skipped: Signature Confirmed)",
+            "skipped": True
+        }
+        heu_result = {
+            "threats": [],
+            "risk_score": 0,
+            "filename_bonus": self.heuristic_layer.filename_bonus(filename),
+            "layer": "Heuristic (Skipped: Signature Confirmed)",
+            "skipped": True
+        }
+        return ml_result, heu_result, {"score": 0, "signals": []}
+
+    def scan_file(self, file_data: bytes, filename: str, deep: bool = False) -> Dict[str, Any]:
+        """
+        Runs all layers on one file. A signature score of 100 already guarantees a MALICIOUS
+        verdict, so the remaining layers are skipped unless deep=True (full audit).
+        """
         start_time = time.time()
         
         # Layer 1: Signature Scan
         sig_result = self.signature_layer.scan(file_data, filename)
         
-        # Layer 2: ML Scan
-        ml_result = self.ml_layer.scan(file_data)
+        if sig_result['risk_score'] >= 100 and not deep:
+            ml_result, heu_result, frag_result = self._skipped_layers(file_data, filename)
+        elif len(file_data) >= self.PARALLEL_MIN_BYTES:
+            # Layers 2 and 3 overlap on the pool
+            ml_future = self._pool.submit(self.ml_layer.scan, file_data)
+            heu_future = self._pool.submit(self.heuristic_layer.scan, file_data, filename)
+            frag_result = self.calculate_entropy_fragmentation(file_data)
+            ml_result = ml_future.result()
+            heu_result = heu_future.result()
+        else:
+            # Layer 2: ML Scan
+            ml_result = self.ml_layer.scan(file_data)
+            
+            # Layer 3: Heuristic & Advanced Fragmentation
+            heu_result = self.heuristic_layer.scan(file_data, filename)
+            frag_result = self.calculate_entropy_fragmentation(file_data)
+        
+        return self._aggregate([(file_data, filename)], [sig_result], [ml_result], [heu_result], [frag_result],
+                               time.time() - start_time)[0]
+
+    def scan_many(self, files: List[Tuple[bytes, str]], deep: bool = False) -> List[Dict[str, Any]]:
+        """
+        Scans a batch of (file_data, filename) pairs.
+        Signatures are checked first; as in scan_file, files they confirm skip the other layers
+        unless deep=True. The ML layer runs once over the remaining files (one histogram kernel,
+        one predict call) while their heuristics run on the pool.
+        Each report's scan_time_ms is the batch duration divided by the batch size.
+        """
+        if not files:
+            return []
+        start_time = time.time()
         
-        # Layer 3: Heuristic & Advanced Fragmentation
-        heu_result = self.heuristic_layer.scan(file_data, filename)
-        frag_result = self.calculate_entropy_fragmentation(file_data)
+        sig_results = list(self._pool.map(lambda f: self.signature_layer.scan(*f), files))
+        pending = [i for i, sig in enumerate(sig_results) if deep or sig['risk_score'] < 100]
         
-        # Final Risk Aggregation (Weighted)
-        weighted_score = (
-            (sig_result['risk_score'] * 0.35) + 
-            (ml_result['ml_risk_score'] * 0.25) + 
-            (heu_result['risk_score'] * 0.25) +
-            (frag_result['score'] * 0.15)
-        )
+        ml_results, heu_results, frag_results = [None] * len(files), [None] * len(files), [None] * len(files)
+        heu_futures = {i: self._pool.submit(self.heuristic_layer.scan, *files[i]) for i in pending}
+        for i, ml in zip(pending, self.ml_layer.scan_many([files[i][0] for i in pending])):
+            ml_results[i] = ml
+        for i, (data, name) in enumerate(files):
+            if i in heu_futures:
+                frag_results[i] = self.calculate_entropy_fragmentation(data)
+            else:
+                ml_results[i], heu_results[i], frag_results[i] = self._skipped_layers(data, name)
+        for i, future in heu_futures.items():
+            heu_results[i] = future.result()
+        
+        per_file_duration = (time.time() - start_time) / len(files)
+        return self._aggregate(files, sig_results, ml_results, heu_results, frag_results, per_file_duration)
+
+    # Weights of the signature, ML, heuristic and fragmentation layers in the final score
+    LAYER_WEIGHTS = (0.35, 0.25, 0.25, 0.15)
+
+    def _risk_scores(self, layer_scores: np.ndarray, filename_bonus: np.ndarray,
+                     benign_doc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Final risk scores for N files from their (N, 4) layer scores, as array operations.
+        Returns the max-impact calibrated scores (before the filename bonus) and the final scores.
+        """
+        # Final Risk Aggregation (Weighted); summed column by column in the original order
+        sig, ml, heu, frag = layer_scores.T
+        w_sig, w_ml, w_heu, w_frag = self.LAYER_WEIGHTS
+        weighted_score = sig * w_sig + ml * w_ml + heu * w_heu + frag * w_frag
         
         # --- MAX-IMPACT LOGIC (Phase VIII Enhancement) ---
-        # If any single layer is extremely confident (>85), we boost the final score
-        max_layer_impact = max(
-            sig_result['risk_score'], 
-            ml_result['ml_risk_score'], 
-            heu_result['risk_score']
-        )
+        # If any single layer is extremely confident (>85), we boost the final score;
+        # from 75 we force Suspicious at minimum
+        max_layer_impact = layer_scores[:, :3].max(axis=1)
+        floor = np.where(max_layer_impact >= 90, max_layer_impact * 0.95,
+                         np.where(max_layer_impact >= 75, 71.0, 0.0))
+        calibrated = np.maximum(weighted_score, floor)
         
-        final_risk_score = weighted_score
-        if max_layer_impact >= 90:
-            final_risk_score = max(final_risk_score, max_layer_impact * 0.95)
-        elif max_layer_impact >= 75:
-            final_risk_score = max(final_risk_score, 71.0) # Force Suspicious at minimum
-            
+        # --- FILENAME INTENT BOOST (Phase VIII.b) ---
+        final_risk_score = np.minimum(calibrated + filename_bonus, 100)
+        
+        # --- BENIGN BIAS (False Positive Protection) ---
+        # Suppress any residual noise on trusted documents
+        final_risk_score = np.where(benign_doc, np.minimum(final_risk_score, 10.0), final_risk_score)
+        return calibrated, final_risk_score
+
+    def _aggregate(self, files: List[Tuple[bytes, str]], sig_results: List[Dict[str, Any]],
+                   ml_results: List[Dict[str, Any]], heu_results: List[Dict[str, Any]],
+                   frag_results: List[Dict[str, Any]], scan_duration: float) -> List[Dict[str, Any]]:
+        layer_scores = np.array([
+            (sig['risk_score'], ml['ml_risk_score'], heu['risk_score'], frag['score'])
+            for sig, ml, heu, frag in zip(sig_results, ml_results, heu_results, frag_results)
+        ], dtype=np.float64)
+        # Keyword matching on the filename is owned by the heuristic layer
+        filename_bonus = np.array([heu.get('filename_bonus', 0) for heu in heu_results], dtype=np.float64)
+        # If it's a .txt or .md file with ZERO content hits and ZERO filename triggers, treat as TRUSTED
+        benign_doc = np.array([
+            name.lower().endswith(('.txt', '.md', '.log'))
+            and sig.get('risk_score', 0) <= 0 and heu.get('risk_score', 0) <= 0
+            for (_, name), sig, heu in zip(files, sig_results, heu_results)
+        ], dtype=bool) & (filename_bonus == 0)
+        
+        calibrated, final = self._risk_scores(layer_scores, filename_bonus, benign_doc)
+        return [
+            self._build_report(data, name, sig, ml, heu, frag, scan_duration,
+                               float(calibrated[i]), float(final[i]), bool(benign_doc[i]))
+            for i, ((data, name), sig, ml, heu, frag)
+            in enumerate(zip(files, sig_results, ml_results, heu_results, frag_results))
+        ]
+
+    def _build_report(self, file_data: bytes, filename: str, sig_result: Dict[str, Any],
+                      ml_result: Dict[str, Any], heu_result: Dict[str, Any], frag_result: Dict[str, Any],
+                      scan_duration: float, calibrated_score: float, final_risk_score: float,
+                      benign_doc: bool) -> Dict[str, Any]:
         # Explainable AI: Generate Risk Breakdown
         explanations = []
         if sig_result['risk_score'] > 0:
@@ -88,26 +206,10 @@ class MalwareEngine:
                 
         # Confidence Calibration
         confidence = ml_result.get('confidence', 0.5) * 100
-        if final_risk_score > 40 and final_risk_score < 70 and confidence < 70:
+        if calibrated_score > 40 and calibrated_score < 70 and confidence < 70:
             explanations.append("Low Confidence: AI detection is uncertain; manual review recommended.")
 
-        # --- FILENAME INTENT BOOST (Phase VIII.b) ---
-        filename_lowercase = filename.lower()
-        intent_keywords = ["malicious", "virus", "payload", "trojan", "stealth", "obfuscated", "bypass", "eicar"]
-        filename_bonus = 0
-        for kw in intent_keywords:
-            if kw in filename_lowercase:
-                filename_bonus += 40
-        
-        final_risk_score = min(final_risk_score + filename_bonus, 100)
-        
-        # --- BENIGN BIAS (False Positive Protection) ---
-        # If it's a .txt or .md file with ZERO content hits and ZERO filename triggers, treat as TRUSTED
-        is_standard_doc = filename_lowercase.endswith(('.txt', '.md', '.log'))
-        total_content_hits = sum(1 for layer in [sig_result, heu_result] if layer.get('risk_score', 0) > 0)
-        
-        if is_standard_doc and total_content_hits == 0 and filename_bonus == 0:
-            final_risk_score = min(final_risk_score, 10.0) # Suppress any residual noise
+        if benign_doc:
             explanations.append("Benign Bias: Standard document with no suspicious patterns identified.")
 
         # Final Classification - TIGHTENED THRESHOLDS
@@ -122,8 +224,6 @@ class MalwareEngine:
             severity = "Low"
             if not any("Benign Bias" in ex for ex in explanations):
                 explanations.append("File appears benign with no significant risk indicators.")
-
-        scan_duration = time.time() - start_time
         
         return {
             "filename": filename,
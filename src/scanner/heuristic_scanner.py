@@ -1,6 +1,63 @@
 import re
+import threading
 from typing import Dict, List
 
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+
+def _compile_lowercase(pattern: str) -> "re.Pattern":
+    """Compile pattern as a bytes regex for lowercased input; escapes such as \\S or \\W are left untouched."""
+    lowered = re.sub(r"\\.|[A-Z]", lambda m: m.group(0) if len(m.group(0)) > 1 else m.group(0).lower(), pattern)
+    return re.compile(lowered.encode())
+
+
+def _literal_of(pattern: str):
+    """The lowercase literal a pattern matches, or None if it uses regex syntax."""
+    if re.search(r"[.^$*+?{}\[\]|()\\]", re.sub(r"\\\W", "", pattern)):
+        return None
+    return re.sub(r"\\(\W)", r"\1", pattern).lower()
+
+
+def _build_literal_automaton(patterns: List[str]):
+    """Aho-Corasick automaton over the literal patterns, valued by pattern id."""
+    automaton = ahocorasick.Automaton()
+    for pattern_id, pattern in enumerate(patterns):
+        literal = _literal_of(pattern)
+        if literal is not None:
+            automaton.add_word(literal, pattern_id)
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_hyperscan_database(patterns: List[str]):
+    """Compile every pattern into one block-mode database; ids follow the pattern order."""
+    expressions = [pattern.encode() for pattern in patterns]
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        expressions=expressions,
+        ids=list(range(len(expressions))),
+        elements=len(expressions),
+        # Each pattern is reported at most once, which is all the per-category count needs
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions),
+    )
+    return database
+
+
+def _collect_match(pattern_id, start, end, flags, context):
+    # Single-match patterns report only their first (earliest-ending) match
+    context[pattern_id] = end
+
+
 class HeuristicScanner:
     """
     Layer 3: Heuristic analysis.
@@ -12,25 +69,101 @@ class HeuristicScanner:
         "Obfuscation Indicators": [r"base64", r"char\(", r"str_replace", r"\\u[0-9a-fA-F]{4}", r"0x[0-9a-fA-F]{2,}"],
         "Web Communication": [r"http://", r"https://", r"ftp://", r"socket\("],
         "PDF Intelligence": [r"/JS", r"/JavaScript", r"/OpenAction", r"/AA", r"/AcroForm", r"/RichMedia"],
-        "Malicious Intent": [r"malicious", r"virus", r"payload", r"trojan", r"hack", r"exploit", r"stealth", r"obfuscated", r"bypass"]
+        # (pattern, filename_bonus) pairs: True earns FILENAME_INTENT_BONUS in the filename
+        # instead of a signal, "only" earns it there and is ignored in the content
+        "Malicious Intent": [(r"malicious", True), (r"virus", True), (r"payload", True), (r"trojan", True),
+                             r"hack", r"exploit", (r"stealth", True), (r"obfuscated", True), (r"bypass", True),
+                             (r"eicar", "only")]
     }
+    # Each bonus keyword found in the filename is worth this much to the engine's final score
+    FILENAME_INTENT_BONUS = 40
+    # Pattern ids index these flattened lists
+    _ENTRIES = [entry if isinstance(entry, tuple) else (entry, False)
+                for patterns in SUSPICIOUS_PATTERNS.values() for entry in patterns]
+    _PATTERNS = [pattern for pattern, _ in _ENTRIES]
+    _FILENAME_BONUS = [bonus for _, bonus in _ENTRIES]
+    _PATTERN_CATEGORIES = [category for category, patterns in SUSPICIOUS_PATTERNS.items() for _ in patterns]
+    _COMPILED_PATTERNS = [_compile_lowercase(pattern) for pattern in _PATTERNS]
+    # Literal patterns go through one Aho-Corasick pass; only the rest need re
+    _LITERAL_AUTOMATON = _build_literal_automaton(_PATTERNS) if HAS_AHOCORASICK else None
+    _REGEX_PATTERN_IDS = [i for i, pattern in enumerate(_PATTERNS) if _literal_of(pattern) is None]
+    _HS_DATABASE = _build_hyperscan_database(_PATTERNS) if HAS_HYPERSCAN else None
+    # A scratch space serves one scan at a time, so each thread gets its own
+    _HS_LOCAL = threading.local()
+    # Below this length the per-call setup outweighs the DFA's advantage
+    HYPERSCAN_MIN_LENGTH = 64
+
+    def _first_matches(self, analysis_target: bytes) -> Dict[int, int]:
+        """Maps each matching pattern id to the end offset of its first match in analysis_target."""
+        if self._HS_DATABASE is not None and len(analysis_target) >= self.HYPERSCAN_MIN_LENGTH:
+            # One SIMD DFA pass matches all patterns at once
+            scratch = getattr(self._HS_LOCAL, "scratch", None)
+            if scratch is None:
+                scratch = self._HS_LOCAL.scratch = hyperscan.Scratch(self._HS_DATABASE)
+            matched = {}
+            self._HS_DATABASE.scan(analysis_target, match_event_handler=_collect_match, context=matched,
+                                   scratch=scratch)
+            return matched
+
+        # Lowercase once (ASCII only, at C speed) and search case-sensitively:
+        # re.IGNORECASE disables the literal-prefix fast scan
+        analysis_target = analysis_target.lower()
+        matched = {}
+        if self._LITERAL_AUTOMATON is not None:
+            n_literals = len(self._LITERAL_AUTOMATON)
+            # The automaton is built over str keys; latin-1 maps bytes 1:1. Matches come
+            # in order of their end index, so the first one seen per pattern is kept
+            for end_index, pattern_id in self._LITERAL_AUTOMATON.iter(analysis_target.decode('latin-1')):
+                if pattern_id not in matched:
+                    matched[pattern_id] = end_index + 1
+                    if len(matched) == n_literals:
+                        break
+            regex_ids = self._REGEX_PATTERN_IDS
+        else:
+            regex_ids = range(len(self._PATTERNS))
+        for i in regex_ids:
+            match = self._COMPILED_PATTERNS[i].search(analysis_target)
+            if match:
+                matched[i] = match.end()
+        return matched
+
+    def _filename_intent(self, matched: Dict[int, int], filename_length: int) -> set:
+        """Ids of the filename-bonus patterns whose first match lies in the leading filename."""
+        return {pattern_id for pattern_id, end in matched.items()
+                if end <= filename_length and self._FILENAME_BONUS[pattern_id]}
+
+    def filename_bonus(self, filename: str) -> int:
+        """Intent bonus for a filename alone, for callers that skip the full scan."""
+        filename_bytes = filename.encode('utf-8', errors='ignore')
+        matched = self._first_matches(filename_bytes)
+        return self.FILENAME_INTENT_BONUS * len(self._filename_intent(matched, len(filename_bytes)))
 
     def scan(self, file_data: bytes, filename: str = "") -> Dict[str, any]:
         threats = []
         risk_score = 0
         
-        # Convert to string for regex
-        content_str = file_data.decode('utf-8', errors='ignore')
+        # Patterns are ASCII, so they can be matched on the raw bytes. Only
+        # non-ASCII content is round-tripped through a lenient UTF-8 decode, so
+        # undecodable bytes are still dropped and cannot be used to split a keyword.
+        if not file_data.isascii():
+            file_data = file_data.decode('utf-8', errors='ignore').encode('utf-8')
+        
+        # Combined check for filename and content. No pattern spans the separating
+        # space, and with the filename first, a pattern's first match lies in the
+        # filename whenever the filename contains it.
+        filename_bytes = filename.encode('utf-8', errors='ignore')
+        matched = self._first_matches(b" ".join((filename_bytes, file_data)))
+        
+        # Bonus keywords in the filename earn the engine's filename bonus and are not
+        # counted again as heuristic signals
+        filename_intent = self._filename_intent(matched, len(filename_bytes))
         
-        # Combined check for content and filename
-        analysis_target = f"{content_str} {filename}"
+        matches_per_category = dict.fromkeys(self.SUSPICIOUS_PATTERNS, 0)
+        for pattern_id in matched.keys() - filename_intent:
+            if self._FILENAME_BONUS[pattern_id] != "only":
+                matches_per_category[self._PATTERN_CATEGORIES[pattern_id]] += 1
         
-        for category, patterns in self.SUSPICIOUS_PATTERNS.items():
-            category_matches = 0
-            for pattern in patterns:
-                if re.search(pattern, analysis_target, re.IGNORECASE):
-                    category_matches += 1
-            
+        for category, category_matches in matches_per_category.items():
             if category_matches > 0:
                 threats.append(f"Heuristic Match: Found {category_matches} {category} signals")
                 points = 25 if category == "Malicious Intent" else 20
@@ -39,5 +172,6 @@ class HeuristicScanner:
         return {
             "threats": threats,
             "risk_score": min(risk_score, 100),
+            "filename_bonus": self.FILENAME_INTENT_BONUS * len(filename_intent),
             "layer": "Heuristic"
         }
@@ -1,67 +1,165 @@
 import numpy as np
 import math
+import threading
 from typing import Dict, List
 from ..models.hybrid_ensemble import HybridThreatDetector
 
+try:
+    import numba
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _histogram256(buf, n_parts):
+        """Byte histogram with one partial per thread-sized slice, summed at the end."""
+        partials = np.zeros((n_parts, 256), np.int64)
+        step = (buf.size + n_parts - 1) // n_parts
+        for part in prange(n_parts):
+            for i in range(part * step, min((part + 1) * step, buf.size)):
+                partials[part, buf[i]] += 1
+        return partials.sum(axis=0)
+
+    @njit(parallel=True, cache=True)
+    def _batch_histograms(buf, offsets):
+        """Byte histogram of each file in a concatenated buffer; file f spans offsets[f]:offsets[f + 1]."""
+        n_files = offsets.size - 1
+        hists = np.zeros((n_files, 256), np.int64)
+        for f in prange(n_files):
+            for i in range(offsets[f], offsets[f + 1]):
+                hists[f, buf[i]] += 1
+        return hists
+
 class MLScanner:
     """
     Layer 2: ML-based detection.
     Extracts features from byte distribution and entropy for AI classification.
     """
+    # Below this size np.bincount beats spinning up the parallel kernel
+    PARALLEL_HISTOGRAM_MIN_BYTES = 1 << 20
+
+    N_FEATURES = 20
+
     def __init__(self, ensemble: HybridThreatDetector = None):
         self.ensemble = ensemble
+        # Per-thread feature rows: the engine may run scans concurrently
+        self._local = threading.local()
+        if HAS_NUMBA:
+            # Pay the JIT (or cache load) cost up front rather than on the first large scan
+            _histogram256(np.frombuffer(bytes(1024), dtype=np.uint8), 1)
+            _batch_histograms(np.frombuffer(bytes(1024), dtype=np.uint8), np.array([0, 1024], dtype=np.int64))
+
+    def _byte_histogram(self, data: bytes) -> np.ndarray:
+        """Count of each byte value (0-255) in one vectorized pass."""
+        buf = np.frombuffer(data, dtype=np.uint8)
+        if HAS_NUMBA and buf.size >= self.PARALLEL_HISTOGRAM_MIN_BYTES:
+            return _histogram256(buf, numba.get_num_threads())
+        return np.bincount(buf, minlength=256)
+
+    def _byte_histograms(self, files: List[bytes]) -> np.ndarray:
+        """(N, 256) byte counts for a batch of files."""
+        if HAS_NUMBA:
+            offsets = np.zeros(len(files) + 1, dtype=np.int64)
+            np.cumsum([len(data) for data in files], out=offsets[1:])
+            return _batch_histograms(np.frombuffer(b"".join(files), dtype=np.uint8), offsets)
+        hists = np.zeros((len(files), 256), dtype=np.int64)
+        for row, data in zip(hists, files):
+            row += np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        return hists
+
+    def _entropy_from_counts(self, counts: np.ndarray) -> float:
+        p = counts[counts > 0] / counts.sum()
+        return 0.0 - float((p * np.log2(p)).sum())
 
     def calculate_entropy(self, data: bytes) -> float:
         if not data: return 0.0
-        counts = {}
-        for b in data: counts[b] = counts.get(b, 0) + 1
-        entropy = 0.0
-        for count in counts.values():
-            p = count / len(data)
-            entropy -= p * math.log2(p)
-        return entropy
+        return self._entropy_from_counts(self._byte_histogram(data))
 
     def extract_byte_distribution(self, data: bytes) -> np.ndarray:
         """Calculates frequency of each byte (0-255)."""
         if not data: return np.zeros(256)
-        counts = np.zeros(256)
-        for b in data: counts[b] += 1
-        return counts / len(data)
+        return self._byte_histogram(data).astype(np.float64) / len(data)
+
+    def _feature_buffer(self) -> np.ndarray:
+        """Reusable (1, N_FEATURES) float32 row owned by the calling thread."""
+        feat = getattr(self._local, "feat", None)
+        if feat is None:
+            feat = self._local.feat = np.zeros((1, self.N_FEATURES), dtype=np.float32)
+        return feat
+
+    def _baseline_result(self, entropy: float, size: int) -> Dict[str, any]:
+        # Heuristic fallback for ML score
+        ml_risk = 0
+        if entropy > 7.9: ml_risk = 40 # Packed/Encrypted
+        if entropy < 1.0 and size > 100: ml_risk = 30 # Null padding/Shellcode
+        
+        return {
+            "entropy": round(entropy, 4),
+            "ml_risk_score": ml_risk,
+            "confidence": 0.5,
+            "layer": "Machine Learning (Baseline)"
+        }
+
+    def _ensemble_result(self, entropy: float, result: Dict[str, any], i: int) -> Dict[str, any]:
+        return {
+            "entropy": round(entropy, 4),
+            "ml_risk_score": float(result['final_score'][i]) * 100,
+            "confidence": float(result['confidence'][i]),
+            "contributions": {
+                "rf": float(result['rf_contribution'][i]),
+                "pattern": float(result['cnn_contribution'][i]),
+                "anomaly": float(result['ae_contribution'][i])
+            },
+            "layer": "Machine Learning (Hybrid Ensemble)"
+        }
 
     def scan(self, file_data: bytes) -> Dict[str, any]:
-        entropy = self.calculate_entropy(file_data)
-        byte_dist = self.extract_byte_distribution(file_data)
+        # One histogram feeds both the entropy and the byte distribution
+        if file_data:
+            counts = self._byte_histogram(file_data)
+            entropy = self._entropy_from_counts(counts)
+        else:
+            counts = None
+            entropy = 0.0
         
         # Mock prediction if ensemble isn't loaded (for standalone testing)
         if self.ensemble is None:
-            # Heuristic fallback for ML score
-            ml_risk = 0
-            if entropy > 7.9: ml_risk = 40 # Packed/Encrypted
-            if entropy < 1.0 and len(file_data) > 100: ml_risk = 30 # Null padding/Shellcode
-            
-            return {
-                "entropy": round(entropy, 4),
-                "ml_risk_score": ml_risk,
-                "confidence": 0.5,
-                "layer": "Machine Learning (Baseline)"
-            }
+            return self._baseline_result(entropy, len(file_data))
         
         # If ensemble is present, we use a reduced feature set (top 20) 
         # for real-time file scanning compatibility
-        features = np.zeros(20)
-        features[0] = entropy
-        features[1:min(20, len(byte_dist)+1)] = byte_dist[:19]
+        features = self._feature_buffer()
+        features[0, 0] = entropy
+        if counts is not None:
+            np.divide(counts[:self.N_FEATURES - 1], len(file_data), out=features[0, 1:])
+        else:
+            features[0, 1:] = 0.0
         
-        result = self.ensemble.predict(features.reshape(1, -1))
-        
-        return {
-            "entropy": round(entropy, 4),
-            "ml_risk_score": result['final_score'][0] * 100,
-            "confidence": result['confidence'][0],
-            "contributions": {
-                "rf": result['rf_contribution'][0],
-                "pattern": result['cnn_contribution'][0],
-                "anomaly": result['ae_contribution'][0]
-            },
-            "layer": "Machine Learning (Hybrid Ensemble)"
-        }
+        result = self.ensemble.predict(features)
+        return self._ensemble_result(entropy, result, 0)
+
+    def scan_many(self, files: List[bytes]) -> List[Dict[str, any]]:
+        """
+        Batched equivalent of scan: one histogram kernel over all files and a single
+        ensemble.predict call for the whole feature matrix.
+        """
+        if not files:
+            return []
+        sizes = np.array([len(data) for data in files], dtype=np.int64)
+        hists = self._byte_histograms(files)
+
+        p = hists / np.maximum(sizes, 1)[:, None]
+        log_p = np.log2(p, out=np.zeros_like(p), where=p > 0)
+        entropies = (0.0 - (p * log_p).sum(axis=1)).tolist()
+
+        if self.ensemble is None:
+            return [self._baseline_result(e, int(n)) for e, n in zip(entropies, sizes)]
+
+        features = np.empty((len(files), self.N_FEATURES), dtype=np.float32)
+        features[:, 0] = entropies
+        features[:, 1:] = p[:, :self.N_FEATURES - 1]
+        result = self.ensemble.predict(features)
+        return [self._ensemble_result(e, result, i) for i, e in enumerate(entropies)]
@@ -1,43 +1,84 @@
-import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
 import os
+import numpy as np
+import pandas as pd
+
+from ..utils.history_manager import migrate_legacy_history, HistoryTail, append_record
 
 class ThreatCorrelator:
     """
     Intelligent Threat Correlation for Phase VII.
     Identifies variants and clusters based on historical data.
     """
+    # Flattened history fields used for correlation, in json_normalize naming
+    _COLUMNS = ['sha256', 'risk_score', 'layers.ml.entropy', 'detection', 'id', 'filename', 'timestamp']
+
     def __init__(self, history_file: str = "logs/malware_history.json"):
-        self.history_file = history_file
+        self.history_file = migrate_legacy_history(history_file)
+        self._cache: Optional[pd.DataFrame] = None
+        self._cache_mtime = 0
+        self._tail = HistoryTail(self.history_file)
+        # sha256 -> ids of every record carrying that hash
+        self._ids_by_sha: Dict[str, Set[Any]] = {}
 
-    def find_correlations(self, current_scan: Dict[str, Any]) -> List[str]:
-        correlations = []
-        if not os.path.exists(self.history_file):
-            return correlations
+    def _load(self) -> Optional[pd.DataFrame]:
+        """
+        Return the history (oldest first) as a DataFrame indexed by sha256.
+        Only lines appended since the previous call are parsed; a rewritten file is reloaded.
+        """
+        try:
+            st = os.stat(self.history_file)
+        except OSError:
+            return None
+        if self._cache is not None and st.st_mtime_ns == self._cache_mtime:
+            return self._cache
 
         try:
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
+            records, rewritten = self._tail.read()
         except:
+            return None
+        if rewritten:
+            self._cache = None
+            self._ids_by_sha = {}
+
+        for record in records:
+            self._ids_by_sha.setdefault(record.get('sha256'), set()).add(record.get('id'))
+
+        # A touched file or a half-written line brings no new records: keep the cache as is
+        if records or self._cache is None:
+            new = pd.json_normalize(records).reindex(columns=self._COLUMNS).set_index('sha256')
+            new['risk_score'] = pd.to_numeric(new['risk_score'], errors='coerce')
+            new['layers.ml.entropy'] = pd.to_numeric(new['layers.ml.entropy'], errors='coerce')
+            self._cache = new if self._cache is None else pd.concat([self._cache, new])
+        self._cache_mtime = st.st_mtime_ns
+        return self._cache
+
+    def append_record(self, record: Dict[str, Any]):
+        """Appends a scan record to the history; it is picked up incrementally by the next lookup."""
+        append_record(self.history_file, record)
+
+    def find_correlations(self, current_scan: Dict[str, Any]) -> List[str]:
+        correlations = []
+        df = self._load()
+        if df is None:
             return correlations
 
+        cur_sha = current_scan['sha256']
+
         # 1. Exact Hash Match in History
-        for record in history:
-            if record['sha256'] == current_scan['sha256'] and record.get('id') != current_scan.get('id'):
-                correlations.append("Recurrent Hash: Exact same payload detected previously.")
-                break
+        if self._ids_by_sha.get(cur_sha, set()) - {current_scan.get('id')}:
+            correlations.append("Recurrent Hash: Exact same payload detected previously.")
 
         # 2. Similarity Check (Entropy & Risk Level)
-        critical_history = [r for r in history if r['detection'] == 'MALICIOUS']
-        for record in critical_history:
-            # Check for structural similarity (very basic mock logic)
-            # If entropy and risk score are extremely close, it might be a variant
-            entropy_diff = abs(record['layers']['ml']['entropy'] - current_scan['layers']['ml']['entropy'])
-            risk_diff = abs(record['risk_score'] - current_scan['risk_score'])
-            
-            if entropy_diff < 0.05 and risk_diff < 5 and record['sha256'] != current_scan['sha256']:
-                correlations.append(f"Heuristic Variant: Structural similarity to known threat {record['id']}")
-                break
+        # If entropy and risk score are extremely close, it might be a variant
+        mask = ((df['detection'] == 'MALICIOUS')
+                & (np.abs(df['layers.ml.entropy'] - current_scan['layers']['ml']['entropy']) < 0.05)
+                & (np.abs(df['risk_score'] - current_scan['risk_score']) < 5)
+                & (df.index != cur_sha))
+        if mask.any():
+            # Most recent matching threat
+            record_id = df['id'].to_numpy()[np.flatnonzero(mask.to_numpy())[-1]]
+            correlations.append(f"Heuristic Variant: Structural similarity to known threat {record_id}")
 
         return list(set(correlations))
 
@@ -46,40 +87,27 @@ class ThreatCorrelator:
         Finds similar threats based on SHA256 and risk score.
         Returns a list of similar threat records.
         """
-        similar_threats = []
-        if not os.path.exists("logs/malware_history.json"):
-            return similar_threats
+        df = self._load()
+        if df is None:
+            return []
 
-        try:
-            with open("logs/malware_history.json", 'r') as f:
-                history = json.load(f)
-        except:
-            return similar_threats
-
-        for record in history:
-            # Skip valid records if they don't have necessary fields
-            if 'sha256' not in record or 'risk_score' not in record:
-                continue
-
-            # Exact hash match
-            if record['sha256'] == sha256:
-                similar_threats.append({
-                    "type": "Exact Match",
-                    "id": record.get('id', 'Unknown'),
-                    "filename": record.get('filename', 'Unknown'),
-                    "timestamp": record.get('timestamp', 'Unknown'),
-                    "risk_score": record['risk_score']
-                })
-                continue
-
-            # Risk score similarity (within 5 points)
-            if abs(record['risk_score'] - risk_score) < 5:
-                similar_threats.append({
-                    "type": "Risk Variant",
-                    "id": record.get('id', 'Unknown'),
-                    "filename": record.get('filename', 'Unknown'),
-                    "timestamp": record.get('timestamp', 'Unknown'),
-                    "risk_score": record['risk_score']
-                })
-
-        return similar_threats[:5]  # Return top 5 matches
+        # Skip records that don't have the necessary fields
+        valid = df.index.notna() & df['risk_score'].notna().to_numpy()
+        exact = valid & (df.index == sha256)
+        variant = valid & ~exact & (np.abs(df['risk_score'] - risk_score) < 5).to_numpy()
+
+        # Newest matches first; only the top 5 are returned
+        positions = np.flatnonzero(exact | variant)[::-1][:5]
+        matches = df.iloc[positions].fillna('Unknown')
+        return [
+            {
+                "type": "Exact Match" if is_exact else "Risk Variant",
+                "id": record_id,
+                "filename": filename,
+                "timestamp": timestamp,
+                "risk_score": float(score),
+            }
+            for is_exact, record_id, filename, timestamp, score in zip(
+                exact[positions], matches['id'], matches['filename'],
+                matches['timestamp'], matches['risk_score'])
+        ]
@@ -5,6 +5,12 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from datetime import datetime
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 class LogExporter:
     """
     Utility to export logs and metrics in various formats (CSV, JSON, PDF).
@@ -17,6 +23,14 @@ class LogExporter:
 
     @staticmethod
     def to_json(log_list: list, output_path: str):
+        if HAS_ORJSON:
+            # orjson only indents by 2; it also serializes datetimes and numpy values natively
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(
+                    log_list,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                ))
+            return output_path
         with open(output_path, 'w') as f:
             json.dump(log_list, f, indent=4)
         return output_path
@@ -39,16 +53,25 @@ class LogExporter:
         c.setFont("Helvetica-Bold", 12)
         c.drawString(50, height - 110, "Summary Metrics")
         
-        y_pos = height - 130
-        c.setFont("Helvetica", 10)
-        for key, value in metrics.items():
-            c.drawString(70, y_pos, f"{key.replace('_', ' ').title()}: {value}")
-            y_pos -= 20
-        
-        # Security Note
-        c.setFont("Helvetica-Oblique", 8)
-        c.drawString(50, 50, "Classification: Internal SOC Use Only")
+        # All metric lines go into one text object per page (a single BT/ET block)
+        # instead of one positioned drawString call each
+        lines = [f"{key.replace('_', ' ').title()}: {value}" for key, value in metrics.items()]
+        top = height - 130
+        while True:
+            per_page = int((top - 70) // 20) + 1
+            text = c.beginText(70, top)
+            text.setFont("Helvetica", 10, leading=20)
+            text.textLines(lines[:per_page])
+            c.drawText(text)
+            lines = lines[per_page:]
+            
+            # Security Note
+            c.setFont("Helvetica-Oblique", 8)
+            c.drawString(50, 50, "Classification: Internal SOC Use Only")
+            c.showPage()
+            if not lines:
+                break
+            top = height - 50
         
-        c.showPage()
         c.save()
         return output_path
@@ -1,47 +1,268 @@
 import json
 import os
-from typing import List, Dict, Any
+import itertools
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(record, default=lambda o: o.isoformat() if isinstance(o, datetime) else float(o)).encode()
+
+
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+
+@contextmanager
+def _write_lock(history_file: str):
+    """
+    Serializes writers of a history file (appends and compaction) across
+    processes through an advisory lock on a sidecar file. No-op without fcntl.
+    """
+    if not HAS_FCNTL:
+        yield
+        return
+    with open(history_file + '.lock', 'ab') as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def migrate_legacy_history(history_file: str) -> str:
+    """
+    Maps a legacy ``.json`` history path to its JSON Lines counterpart, converting
+    the old newest-first array once if the ``.jsonl`` file does not exist yet.
+    """
+    if not history_file.endswith('.json'):
+        return history_file
+    jsonl_file = history_file + 'l'
+    if os.path.exists(history_file) and not os.path.exists(jsonl_file):
+        try:
+            with open(history_file, 'rb') as f:
+                data = _loads(f.read())
+        except Exception:
+            data = []
+        tmp_file = jsonl_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(b''.join(_dumps(r) + b'\n' for r in reversed(data)))
+        os.replace(tmp_file, jsonl_file)
+    return jsonl_file
+
+
+class HistoryTail:
+    """
+    Incremental reader of a JSON Lines history shared with other writers.
+    Each read parses only the complete lines appended since the previous one.
+    """
+    __slots__ = ("history_file", "inode", "head", "offset")
+
+    def __init__(self, history_file: str):
+        self.history_file = history_file
+        self.inode = None
+        # First line of the file: compaction always drops the oldest records, so a
+        # rewrite is noticed even when the new file reuses the old inode number
+        self.head = None
+        self.offset = 0
+
+    def read(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Returns the new records (oldest first) and whether the file was rewritten
+        since the previous read, in which case the records cover the whole file.
+        """
+        with open(self.history_file, 'rb') as f:
+            st = os.fstat(f.fileno())
+            head = f.readline()
+            rewritten = st.st_ino != self.inode or st.st_size < self.offset or head != self.head
+            offset = 0 if rewritten else self.offset
+            if offset == st.st_size and not rewritten:
+                return [], False
+            f.seek(offset)
+            chunk = f.read()
+        # A trailing partial line is left for the next read
+        end = chunk.rfind(b'\n') + 1
+        records = []
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = _loads(line)
+            except ValueError as e:
+                # A corrupt line must not wedge the reader: skip it and move on
+                print(f"History parse error: skipped malformed line ({e})")
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        self.inode, self.head, self.offset = st.st_ino, head, offset + end
+        return records, rewritten
+
+
+def append_record(history_file: str, record: Dict[str, Any]) -> bytes:
+    """Appends a single record to a JSON Lines history file and returns the encoded line."""
+    line = _dumps(record) + b'\n'
+    with _write_lock(history_file), open(history_file, 'ab') as f:
+        f.write(line)
+    return line
+
+
+class _AnalyticsTally:
+    """Running scan, threat and severity counts over a window of history records."""
+    __slots__ = ("total", "threats", "severities")
+
+    def __init__(self):
+        self.total = 0
+        self.threats = 0
+        self.severities: Counter = Counter()
+
+    def update(self, record: Dict[str, Any], sign: int):
+        """Counts a record in (sign=1) or out (sign=-1) of the window."""
+        self.total += sign
+        if record.get('detection') != 'CLEAN':
+            self.threats += sign
+        severity = record.get('severity', 'Low')
+        self.severities[severity] += sign
+        if not self.severities[severity]:
+            del self.severities[severity]
+
+    def summary(self) -> Dict[str, Any]:
+        if self.total == 0:
+            return {"total_scans": 0, "threat_ratio": 0, "severity_dist": {}}
+        return {
+            "total_scans": self.total,
+            "threat_ratio": round((self.threats / self.total) * 100, 1),
+            "severity_dist": dict(self.severities)
+        }
+
+
 class HistoryManager:
     """
     Manages scan history and analytics data for Phase V.
-    Stores records in a local JSON file for persistence.
+    Stores records in a local JSON Lines file (oldest first) for persistence and
+    serves reads from a bounded in-memory window of the newest records, which is
+    tailed from the file before every read so other writers are picked up.
     """
+    # Analytics cover at most this many of the newest (matching) records
+    ANALYTICS_WINDOW = 500
+
     def __init__(self, history_file: str = "logs/malware_history.json", max_records: int = 100):
-        self.history_file = history_file
-        self.max_records = max_records
         os.makedirs(os.path.dirname(history_file), exist_ok=True)
+        self.history_file = migrate_legacy_history(history_file)
+        self.max_records = max_records
         
-        if not os.path.exists(history_file):
-            with open(history_file, 'w') as f:
-                json.dump([], f)
+        if not os.path.exists(self.history_file):
+            open(self.history_file, 'wb').close()
+        self._tail = HistoryTail(self.history_file)
+        self._reset()
+        try:
+            self._refresh()
+        except Exception as e:
+            print(f"History loading error: {e}")
+
+    @property
+    def _capacity(self) -> int:
+        return self.max_records * 5 # Extended storage for multi-user
+
+    def _reset(self):
+        self._records = deque(maxlen=self._capacity)
+        # Analytics counters follow the in-memory window, overall and per user
+        self._tally = _AnalyticsTally()
+        self._user_tallies: Dict[Any, _AnalyticsTally] = {}
+        self._line_count = 0
+
+    def _refresh(self):
+        """Reads the lines appended since the last call; a rewritten file is reloaded."""
+        records, rewritten = self._tail.read()
+        if rewritten:
+            self._reset()
+        self._line_count += len(records)
+        for record in records:
+            self._push(record)
 
     def add_record(self, record: Dict[str, Any]):
         try:
-            with open(self.history_file, 'r+') as f:
-                data = json.load(f)
-                data.insert(0, record) # Newest first
-                # Keep only max_records
-                data = data[:self.max_records * 5] # Extended storage for multi-user
-                f.seek(0)
-                json.dump(data, f, indent=4)
-                f.truncate()
+            append_record(self.history_file, record)
+            # Reads see exactly what was persisted, interleaved with other writers
+            self._refresh()
+            # Trim lazily so appends stay O(1); readers only ever see _capacity records
+            if self._line_count > 2 * self._capacity:
+                self._compact()
         except Exception as e:
             print(f"History logging error: {e}")
 
+    def _push(self, record: Dict[str, Any]):
+        if len(self._records) == self._records.maxlen:
+            self._track(self._records[0], -1)
+        self._records.append(record)
+        self._track(record, 1)
+
+    def _track(self, record: Dict[str, Any], sign: int):
+        self._tally.update(record, sign)
+        user_id = record.get('user_id')
+        tally = self._user_tallies.get(user_id)
+        if tally is None:
+            tally = self._user_tallies[user_id] = _AnalyticsTally()
+        tally.update(record, sign)
+        if tally.total == 0:
+            del self._user_tallies[user_id]
+
+    def _compact(self):
+        with _write_lock(self.history_file):
+            # Catch up with other writers first; appends are blocked until the rewrite lands
+            self._refresh()
+            if self._line_count <= 2 * self._capacity:
+                return  # Another writer compacted already
+            # The in-memory window is exactly what should survive
+            tmp_file = self.history_file + '.tmp'
+            data = b''.join(_dumps(r) + b'\n' for r in self._records)
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.history_file)
+            # Resume tailing right after what was just written
+            self._tail.inode = os.stat(self.history_file).st_ino
+            self._tail.head = data[:data.find(b'\n') + 1]
+            self._tail.offset = len(data)
+            self._line_count = len(self._records)
+
     def get_history(self, limit: int = 20, user_id: str = None) -> List[Dict[str, Any]]:
         try:
-            with open(self.history_file, 'r') as f:
-                data = json.load(f)
-                if user_id:
-                    data = [r for r in data if r.get('user_id') == user_id]
-                return data[:limit]
+            self._refresh()
+            # Newest first
+            data = reversed(self._records)
+            if user_id:
+                data = (r for r in data if r.get('user_id') == user_id)
+            return list(itertools.islice(data, limit))
         except:
             return []
 
     def get_analytics(self, user_id: str = None) -> Dict[str, Any]:
-        history = self.get_history(limit=500, user_id=user_id)
+        try:
+            self._refresh()
+        except:
+            return {"total_scans": 0, "threat_ratio": 0, "severity_dist": {}}
+        if self._capacity <= self.ANALYTICS_WINDOW:
+            # The whole window fits the analytics window: answer from the running counters
+            if not user_id:
+                return self._tally.summary()
+            tally = self._user_tallies.get(user_id)
+            return tally.summary() if tally is not None else _AnalyticsTally().summary()
+
+        history = self.get_history(limit=self.ANALYTICS_WINDOW, user_id=user_id)
         total = len(history)
         if total == 0:
             return {"total_scans": 0, "threat_ratio": 0, "severity_dist": {}}
@@ -1,7 +1,90 @@
+import functools
 import json
 from datetime import datetime
 from typing import Dict, Any
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Static parts of the text report, built once at import
+_TEXT_REPORT_BANNER = r"""
+================================================================================
+  _____ __  __    _    ____ _____ ____ _   _    _    ____  ____      _    ___ 
+ |  ___|  \/  |  / \  |  _ \_   _/ ___| | | |  / \  |  _ \|  _ \    / \  |_ _|
+ |___ \| |\/| | / _ \ | |_) || || |  _| | | | / _ \ | |_) | | | |  / _ \  | | 
+  ___) | |  | |/ ___ \|  _ < | || |_| | |_| |/ ___ \|  _ <| |_| | / ___ \ | | 
+ |____/|_|  |_/_/   \_\_| \_\|_| \____|\___//_/   \_\_| \_\____/ /_/   \_\___|
+ 
+                           ELITE THREAT INTELLIGENCE
+================================================================================
+"""
+
+_TEXT_REPORT_FOOTER = """
+================================================================================
+ END OF REPORT - SMARTGUARD AI
+================================================================================
+"""
+
+# PDF report palette
+COLOR_MALICIOUS = (255, 0, 60)
+COLOR_SUSPICIOUS = (255, 165, 0)
+COLOR_CLEAN = (0, 200, 80)
+COLOR_DARK = (20, 20, 20)
+_THEME_COLORS = {"MALICIOUS": COLOR_MALICIOUS, "SUSPICIOUS": COLOR_SUSPICIOUS}
+
+
+@functools.lru_cache(maxsize=None)
+def _report_pdf_class():
+    """FPDF subclass for scan reports, defined once on first use (fpdf2 stays a lazy import)."""
+    from fpdf import FPDF
+
+    class _ReportPDF(FPDF):
+        # Set per report before the first add_page()
+        report_id = ""
+
+        def header(self):
+            # Professional Dark Header
+            self.set_fill_color(10, 20, 35) # Dark Navy
+            self.rect(0, 0, 210, 40, 'F')
+            
+            # Logo/Title
+            self.set_font('Arial', 'B', 24)
+            self.set_text_color(0, 245, 255) # Cyan
+            self.cell(10)
+            self.cell(0, 15, 'SMARTGUARD AI', 0, 1, 'L')
+            
+            self.set_font('Arial', '', 10)
+            self.set_text_color(200, 200, 200) # Light Grey
+            self.cell(10)
+            self.cell(0, 5, 'ELITE THREAT INTELLIGENCE SYSTEM', 0, 1, 'L')
+            self.cell(10)
+            self.cell(0, 5, f'Report ID: {self.report_id}', 0, 1, 'L')
+            self.ln(20)
+            
+            # Watermark
+            self.set_font('Arial', 'B', 50)
+            self.set_text_color(240, 240, 240)
+            with self.rotation(45, 105, 148):
+                self.text(60, 180, "CONFIDENTIAL")
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.set_text_color(128, 128, 128)
+            self.cell(0, 10, f'Page {self.page_no()} | Generated by SmartGuard AI', 0, 0, 'C')
+
+    return _ReportPDF
+
+
+def _kv_row(pdf, label: str, value: str):
+    """One shaded label cell plus its value cell, spanning the page width."""
+    pdf.cell(40, 8, label, 1, 0, 'L', 1)
+    pdf.cell(150, 8, value, 1, 1, 'L')
+
+
 class ReportGenerator:
     """
     Generates downloadable security reports in JSON and TXT formats.
@@ -31,6 +114,8 @@ class ReportGenerator:
             "layer_analysis": scan_result.get("layers", {}),
             "threat_indicators": scan_result.get("all_threats", [])
         }
+        if HAS_ORJSON:
+            return orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
         return json.dumps(report, indent=2)
     
     def generate_text_report(self, scan_result: Dict[str, Any], filename: str = None) -> str:
@@ -39,17 +124,12 @@ class ReportGenerator:
         breakdown = scan_result.get("risk_breakdown", [])
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        report = f"""
-================================================================================
-  _____ __  __    _    ____ _____ ____ _   _    _    ____  ____      _    ___ 
- |  ___|  \/  |  / \  |  _ \_   _/ ___| | | |  / \  |  _ \|  _ \    / \  |_ _|
- |___ \| |\/| | / _ \ | |_) || || |  _| | | | / _ \ | |_) | | | |  / _ \  | | 
-  ___) | |  | |/ ___ \|  _ < | || |_| | |_| |/ ___ \|  _ <| |_| | / ___ \ | | 
- |____/|_|  |_/_/   \_\_| \_\|_| \____|\___//_/   \_\_| \_\____/ /_/   \_\___|
- 
-                           ELITE THREAT INTELLIGENCE
-================================================================================
-
+        layers = scan_result.get("layers", {}) or {}
+        sig = layers.get("signature", {}) or {}
+        ml = layers.get("ml", {}) or {}
+        heur = layers.get("heuristic", {}) or {}
+        
+        parts = [_TEXT_REPORT_BANNER, f"""
  [ CONFIDENTIAL ANALYSIS REPORT ]
  ------------------------------------------------------------------------------
  Generated:   {timestamp}
@@ -75,100 +155,50 @@ class ReportGenerator:
  ------------------------------------------------------------------------------
  ANALYSIS BREAKDOWN
  ------------------------------------------------------------------------------
-"""
+"""]
         if breakdown:
-            for item in breakdown:
-                report += f" [!] {item}\n"
+            parts.extend(f" [!] {item}\n" for item in breakdown)
         else:
-            report += " [OK] No significant risk factors identified.\n"
+            parts.append(" [OK] No significant risk factors identified.\n")
 
-        report += f"""
+        parts.append(f"""
  ------------------------------------------------------------------------------
  LAYER DIAGNOSTICS
  ------------------------------------------------------------------------------
  LAYER 1: SIGNATURE
- - MIME Type: {scan_result.get("layers", {}).get("signature", {}).get("detected_mime")}
- - Risk:      {scan_result.get("layers", {}).get("signature", {}).get("risk_score")}
+ - MIME Type: {sig.get("detected_mime")}
+ - Risk:      {sig.get("risk_score")}
 
  LAYER 2: NEURAL ENGINE
- - Entropy:   {scan_result.get("layers", {}).get("ml", {}).get("entropy")}
- - Risk:      {scan_result.get("layers", {}).get("ml", {}).get("ml_risk_score")}
+ - Entropy:   {ml.get("entropy")}
+ - Risk:      {ml.get("ml_risk_score")}
 
  LAYER 3: HEURISTICS
- - Risk:      {scan_result.get("layers", {}).get("heuristic", {}).get("risk_score")}
+ - Risk:      {heur.get("risk_score")}
 
  ------------------------------------------------------------------------------
  THREAT INDICATORS
  ------------------------------------------------------------------------------
-"""
+""")
         threats = scan_result.get("all_threats", [])
         if threats:
-            for i, threat in enumerate(threats, 1):
-                report += f" {i}. {threat}\n"
+            parts.extend(f" {i}. {threat}\n" for i, threat in enumerate(threats, 1))
         else:
-            report += " No active threats detected.\n"
+            parts.append(" No active threats detected.\n")
         
-        report += """
-================================================================================
- END OF REPORT - SMARTGUARD AI
-================================================================================
-"""
-        return report
+        parts.append(_TEXT_REPORT_FOOTER)
+        return "".join(parts)
 
     def generate_pdf_report(self, scan_result: Dict[str, Any], filename: str = None) -> bytes:
         """Generate a professional, high-design PDF report."""
-        from fpdf import FPDF
-        
-        class PDF(FPDF):
-            def header(self):
-                # Professional Dark Header
-                self.set_fill_color(10, 20, 35) # Dark Navy
-                self.rect(0, 0, 210, 40, 'F')
-                
-                # Logo/Title
-                self.set_font('Arial', 'B', 24)
-                self.set_text_color(0, 245, 255) # Cyan
-                self.cell(10)
-                self.cell(0, 15, 'SMARTGUARD AI', 0, 1, 'L')
-                
-                self.set_font('Arial', '', 10)
-                self.set_text_color(200, 200, 200) # Light Grey
-                self.cell(10)
-                self.cell(0, 5, 'ELITE THREAT INTELLIGENCE SYSTEM', 0, 1, 'L')
-                self.cell(10)
-                self.cell(0, 5, f'Report ID: {scan_result.get("sha256")[:16]}', 0, 1, 'L')
-                self.ln(20)
-                
-                # Watermark
-                self.set_font('Arial', 'B', 50)
-                self.set_text_color(240, 240, 240)
-                with self.rotation(45, 105, 148):
-                    self.text(60, 180, "CONFIDENTIAL")
-
-            def footer(self):
-                self.set_y(-15)
-                self.set_font('Arial', 'I', 8)
-                self.set_text_color(128, 128, 128)
-                self.cell(0, 10, f'Page {self.page_no()} | Generated by SmartGuard AI', 0, 0, 'C')
-
-        pdf = PDF()
+        pdf = _report_pdf_class()()
+        pdf.report_id = scan_result.get("sha256")[:16]
         pdf.add_page()
         actual_filename = filename if filename else scan_result.get("filename")
         
-        # Colors
-        COLOR_MALICIOUS = (255, 0, 60)
-        COLOR_SUSPICIOUS = (255, 165, 0)
-        COLOR_CLEAN = (0, 200, 80)
-        COLOR_DARK = (20, 20, 20)
-        
         # Determine Status Color
         detection = scan_result.get("detection")
-        if detection == "MALICIOUS":
-            theme_color = COLOR_MALICIOUS
-        elif detection == "SUSPICIOUS":
-            theme_color = COLOR_SUSPICIOUS
-        else:
-            theme_color = COLOR_CLEAN
+        theme_color = _THEME_COLORS.get(detection, COLOR_CLEAN)
 
         # --- Section: Executive Summary ---
         pdf.set_text_color(*COLOR_DARK)
@@ -207,11 +237,8 @@ class ReportGenerator:
         
         # Table-like display
         pdf.set_fill_color(245, 245, 245)
-        pdf.cell(40, 8, 'Filename:', 1, 0, 'L', 1)
-        pdf.cell(150, 8, actual_filename, 1, 1, 'L')
-        
-        pdf.cell(40, 8, 'SHA-256:', 1, 0, 'L', 1)
-        pdf.cell(150, 8, scan_result.get('sha256'), 1, 1, 'L')
+        for label, value in (('Filename:', actual_filename), ('SHA-256:', scan_result.get('sha256'))):
+            _kv_row(pdf, label, value)
         
         pdf.cell(40, 8, 'File Size:', 1, 0, 'L', 1)
         pdf.cell(50, 8, f"{scan_result.get('file_size_kb')} KB", 1, 0, 'L')
@@ -250,9 +277,10 @@ class ReportGenerator:
         pdf.cell(60, 8, "Heuristics", 1, 1, 'C', 1)
         
         pdf.set_font('Arial', '', 10)
-        pdf.cell(60, 20, f"Score: {scan_result.get('layers', {}).get('signature', {}).get('risk_score')}", 1, 0, 'C')
-        pdf.cell(60, 20, f"Score: {scan_result.get('layers', {}).get('ml', {}).get('ml_risk_score')}", 1, 0, 'C')
-        pdf.cell(60, 20, f"Score: {scan_result.get('layers', {}).get('heuristic', {}).get('risk_score')}", 1, 1, 'C')
+        layers = scan_result.get('layers', {})
+        pdf.cell(60, 20, f"Score: {layers.get('signature', {}).get('risk_score')}", 1, 0, 'C')
+        pdf.cell(60, 20, f"Score: {layers.get('ml', {}).get('ml_risk_score')}", 1, 0, 'C')
+        pdf.cell(60, 20, f"Score: {layers.get('heuristic', {}).get('risk_score')}", 1, 1, 'C')
         
         pdf.ln(10)
 